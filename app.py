@@ -1,40 +1,60 @@
 import streamlit as st
 import json
 import os
+import sys
 import requests
 from datetime import datetime
 from dotenv import load_dotenv
 import pandas as pd
 import numpy as np
 import altair as alt
+import pydeck as pdk
+from pydeck.bindings.json_tools import default_serialize
 import calendar
 from gtts import gTTS 
 import tempfile 
-from smallestai.waves import WavesClient
 import wikipedia
-from fpdf import FPDF
 import io
 import pymongo
 import uuid
+import threading
 import urllib.parse
 from werkzeug.security import generate_password_hash, check_password_hash
 
+import culture
+import gemini
+import images
+import jobs
+import memory
+import planner
+import reports
+import shared_cache
+import stories
+import surveys
+from gemini import GEMINI_API_KEY
+from planner import RAPIDAPI_KEYS
+
 load_dotenv()
 
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-RAPIDAPI_KEY = os.environ.get("RAPIDAPI_KEY", "")
-RAPIDAPI_KEY_1 = os.environ.get("RAPIDAPI_KEY_1", "")
-RAPIDAPI_KEY_2 = os.environ.get("RAPIDAPI_KEY_2", "")
-RAPIDAPI_KEYS = [RAPIDAPI_KEY, RAPIDAPI_KEY_1, RAPIDAPI_KEY_2] 
-RAPIDAPI_HOST = "booking-com15.p.rapidapi.com"
-SMALLEST_API_KEY = os.environ.get("SMALLEST_API_KEY", "")
 MONGO_CONNECTION_STRING = os.environ.get("MONGODB_URI", "")
 CURRENT_HOST = os.environ.get("BASE_URL", "http://localhost:8501").rstrip('/')
+JOB_DB_PATH = os.environ.get("JOB_DB_PATH") or "jobs.sqlite3"
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS") or 4)
+MAX_UPSTREAM_CALLS = int(os.environ.get("MAX_UPSTREAM_CALLS") or 2)
+EXPORT_DOWNLOAD_LIMIT_MB = int(os.environ.get("EXPORT_DOWNLOAD_LIMIT_MB") or 50)
+ADMIN_USERNAMES = {name.strip() for name in (os.environ.get("ADMIN_USERNAMES") or "").split(",") if name.strip()}
 
 st.set_page_config(page_title="Rangyatra: Discover India's Hidden Colors of Culture.", layout="wide")
 params = st.query_params
 
+def ensure_survey_indexes(db):
+    """Creates the survey indexes. Without them queries are only slower, so a failure (an existing text index,
+    a missing createIndex privilege, a slow build) is logged instead of breaking the connection."""
+    try:
+        surveys.ensure_indexes(db["surveys"], db["social_survey_responses"], db["survey_summaries"])
+    except Exception as e:
+        print(f"Warning: could not create the survey indexes: {e}", file=sys.stderr)
+
 @st.cache_resource
 def init_connection():
     """Initializes a connection to MongoDB and returns the database object."""
@@ -42,6 +62,8 @@ def init_connection():
         client = pymongo.MongoClient(MONGO_CONNECTION_STRING)
         client.admin.command('ping') # Verify connection
         db = client.rangyatra # Select the database
+        # Index builds can take long on large collections, so they run in the background.
+        threading.Thread(target=ensure_survey_indexes, args=(db,), name="rangyatra-indexes", daemon=True).start()
         # st.success("Successfully connected to MongoDB!")
         return db
     except Exception as e:
@@ -50,6 +72,32 @@ def init_connection():
 
 db = init_connection() # Initialize connection when the app starts
 
+@st.cache_resource
+def init_job_queue():
+    """Starts the background job queue shared by every session of this Streamlit process."""
+    return jobs.JobQueue(JOB_DB_PATH, max_workers=JOB_WORKERS, max_upstream_calls=MAX_UPSTREAM_CALLS)
+
+job_queue = init_job_queue()
+
+CACHE_WARMUP = (os.environ.get("CACHE_WARMUP") or "1") == "1"
+
+@st.cache_resource
+def init_shared_cache():
+    """Opens the cache shared by every session and process, and warms it in the background on startup."""
+    cache = shared_cache.from_env()
+    if CACHE_WARMUP:
+        threading.Thread(target=culture.warm_cache, args=(cache,), name="rangyatra-warmup", daemon=True).start()
+    return cache
+
+results_cache = init_shared_cache()
+
+@st.cache_resource
+def init_memory_tracking():
+    """Creates the blob store for large session payloads and the registry of per-session memory footprints."""
+    return memory.BlobStore(memory.BLOB_STORE_MAX_MB * 1024 * 1024), memory.SessionRegistry()
+
+blob_store, session_registry = init_memory_tracking()
+
 def local_css(file_name):
     with open(file_name) as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
@@ -61,16 +109,20 @@ if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "username" not in st.session_state:
     st.session_state.username = ""
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4()) # Owner of the background jobs started in this session
 
 # --- Database Collections (ensure db is initialized) ---
 users_collection = None
 responses_collection_survey = None # Renamed to avoid conflict if you have other 'responses'
 surveys_collection = None
+summaries_collection = None
 
 if db is not None:
     users_collection = db["users"]
     responses_collection_survey = db["social_survey_responses"] # Specific name for survey responses
     surveys_collection = db["surveys"]
+    summaries_collection = db["survey_summaries"] # One rolling AI summary per survey
 else:
     st.error("Database connection failed. User authentication and survey features will not work.")
     # Optionally, stop the app or disable features if db is critical
@@ -130,6 +182,175 @@ def display_login_signup_forms():
         if st.button("Signup", key="signup_button_main"):
             signup_user(signup_username, signup_password)
 
+# --- Rerun-aware page state ---
+# Streamlit reruns the whole script on every widget interaction. Expensive results are memoized in
+# st.session_state keyed by the section name plus the inputs they were computed from, so a rerun only
+# recomputes a section when its own inputs change (or when it is explicitly invalidated). Sections whose
+# results are the same for everyone are also kept in the shared cache, so other sessions, processes and
+# restarts reuse them.
+if "_memo" not in st.session_state:
+    st.session_state._memo = {}
+if "_memo_stale" not in st.session_state:
+    st.session_state._memo_stale = set() # Invalidated sections: skip the shared cache on their next compute
+
+# Large byte payloads (audio stories, PDF reports) are kept once in the process-wide blob store rather than in
+# every session; a payload evicted from the store reads as a miss and is reloaded or recomputed.
+def memo_get(section, *inputs):
+    return memory.load_blobs(blob_store, st.session_state._memo.get((section,) + inputs))
+
+def memo_set(section, *inputs, value):
+    st.session_state._memo[(section,) + inputs] = memory.store_blobs(blob_store, value)
+    return value
+
+def memo_invalidate(section):
+    """Drops every memoized result of a section, whatever inputs it was computed from."""
+    for key in [key for key in st.session_state._memo if key[0] == section]:
+        del st.session_state._memo[key]
+    st.session_state._memo_stale.add(section)
+
+def memoized(section, *inputs, compute, shared=False, ttl=None):
+    """Returns the memoized result for (section, inputs), calling compute() only on a miss.
+    With shared, the shared cache is checked before computing and updated after. Failed computations
+    (None) are not stored, so the next rerun retries them; compute() should therefore return None for
+    malformed results too (see culture.expect_keys) rather than share them with every session. ttl overrides
+    how long a shared result is kept."""
+    return memoized_with_status(section, *inputs, compute=compute, shared=shared, ttl=ttl)[0]
+
+def memoized_with_status(section, *inputs, compute, shared=False, ttl=None):
+    """Like memoized(), but returns (result, computed), where computed tells whether compute() ran."""
+    value = memo_get(section, *inputs)
+    if value is None and shared and section not in st.session_state._memo_stale:
+        value = results_cache.get(section, *inputs)
+    computed = value is None
+    if computed:
+        value = compute()
+        if value is not None and shared:
+            results_cache.set(section, *inputs, value=value, ttl=ttl)
+            st.session_state._memo_stale.discard(section)
+    if value is not None:
+        memo_set(section, *inputs, value=value)
+    return value, computed
+
+# Gemini calls are scheduled against one shared quota: pages where a user waits on the answer go first.
+PAGE_PRIORITIES = {"Travel Planner": gemini.INTERACTIVE, "Whispering Walls": gemini.INTERACTIVE}
+
+def gemini_user():
+    """The user the current session's Gemini spend is attributed to."""
+    return st.session_state.username if st.session_state.logged_in else f"guest-{st.session_state.session_id[:8]}"
+
+def is_admin():
+    """Whether the session belongs to an operator (ADMIN_USERNAMES), who may see process-wide reports."""
+    return st.session_state.logged_in and st.session_state.username in ADMIN_USERNAMES
+
+def gemini_caller(priority=None):
+    """Attributes the Gemini calls made inside the block to the current page and user."""
+    if priority is None:
+        priority = PAGE_PRIORITIES.get(selected_page, gemini.NORMAL)
+    return gemini.caller(selected_page, gemini_user(), priority)
+
+# Gemini API integration function
+def get_gemini_data(prompt, priority=None):
+    if not GEMINI_API_KEY:
+        st.error("Gemini API Key is not set!")
+        return None
+    try:
+        with gemini_caller(priority):
+            return gemini.generate_json(prompt)
+    except Exception as e:
+        st.error(f"Error fetching data from Gemini API: {str(e)}")
+    return None
+
+# --- Images ---
+# Remote images are served as compact local copies sized to how they are displayed (see images.py).
+HOTEL_IMAGE_WIDTH = 150
+WIKIPEDIA_IMAGE_WIDTH = 500  # The size of the Wikipedia thumbnails the pages request
+
+def compact_image(url, width):
+    """Returns the cached, resized image bytes for st.image, or the original URL if it cannot be processed."""
+    try:
+        return images.get_image(url, width)
+    except Exception:
+        return url
+
+# --- Background jobs ---
+# Long-running generation runs on the shared job queue. Pages only keep the job ID (memoized like any other
+# result), so the work carries on while the user browses other pages and is picked up when they come back.
+JOB_LABELS = {"travel_plan": "Travel plan", "audio_story": "Audio story", "dashboard_pdf": "PDF report",
+              "survey_export": "Survey export", "survey_summary": "AI summary"}
+
+def submit_job(kind, key, fn, *args, reuse_done=False, priority=None):
+    with gemini_caller(priority): # Jobs inherit the caller, so their Gemini calls count towards this page and user
+        return job_queue.submit(kind, key, fn, *args, owner=st.session_state.session_id, reuse_done=reuse_done)
+
+@st.fragment(run_every="2s")
+def job_progress_poller(job_id, label):
+    job = job_queue.get(job_id)
+    if job is None or job["status"] not in jobs.ACTIVE_STATUSES:
+        st.rerun() # Finished: rerun so the page renders the result in place of the progress bar
+    st.progress(job["progress"], text=job["message"] or f"{label} is queued...")
+    st.caption("You can browse other pages meanwhile — the result will be waiting here when you come back.")
+
+def job_result(job_id, label):
+    """Returns a finished job's result. While the job is still pending, shows its progress and polls it."""
+    job = job_queue.get(job_id)
+    if job is None:
+        st.error(f"The {label.lower()} job is no longer available. Please try again.")
+    elif job["status"] == jobs.DONE:
+        return job["result"]
+    elif job["status"] == jobs.FAILED:
+        st.error(f"Error generating {label.lower()}: {job['error']}")
+    else:
+        job_progress_poller(job_id, label)
+    return None
+
+def gemini_upstream(job):
+    """Holds the job's upstream slot around each Gemini call in the block, taken only after the quota scheduler
+    admits the call, so jobs queued for quota never keep a slot from higher-priority work."""
+    return gemini.upstream_slot(job.upstream())
+
+def run_travel_plan_job(job, current_location, legs, interest, refresh=False):
+    job.progress(0.05, "Generating your personalized travel plan... This might take a moment!")
+    with gemini_upstream(job):
+        travel_plan = planner.compose_itinerary(current_location, legs, interest, refresh=refresh)
+    places = travel_plan.get("recommended_places") or []
+    hotels = {}
+    for i, place in enumerate(places):
+        job.progress(0.5 + 0.5 * i / len(places), f"Finding hotels near {place}...")
+        with job.upstream():
+            hotels[place] = planner.search_hotels(place)
+        for hotel in hotels[place] or []:
+            if hotel.get("image_url"):
+                compact_image(hotel["image_url"], HOTEL_IMAGE_WIDTH) # Fetch now, so the plan renders from the cache
+    return {"plan": travel_plan, "hotels": hotels}
+
+def run_audio_story_job(job, selected_site):
+    job.progress(0.05, f"Writing the story of {selected_site}...")
+    with gemini_upstream(job):
+        story_text = gemini.generate_text(stories.build_story_prompt(selected_site), {"maxOutputTokens": 500})
+    job.progress(0.5, "Narrating the story...")
+    with job.upstream():
+        audio_bytes = stories.synthesize_speech(story_text)
+    return story_text, audio_bytes
+
+def run_dashboard_pdf_job(job, *report_inputs):
+    job.progress(0.5, "Building PDF report...")
+    return reports.build_dashboard_pdf(*report_inputs)
+
+def run_survey_export_job(job, questions, fmt):
+    total = responses_collection_survey.count_documents({"survey_id": {"$in": list(questions)}})
+    path = surveys.new_export_path(fmt)
+    rows = surveys.export_responses(
+        responses_collection_survey, questions, fmt, path,
+        progress=lambda rows: job.progress(rows / total if total else 1.0, f"Exported {rows:,} of {total:,} responses..."))
+    return {"path": path, "rows": rows, "format": fmt}
+
+def run_survey_summary_job(job, survey_id, question):
+    total = responses_collection_survey.count_documents({"survey_id": survey_id})
+    job.progress(0.05, "Reading new responses...")
+    return surveys.update_summary(
+        summaries_collection, responses_collection_survey, survey_id, question, upstream=lambda: gemini_upstream(job),
+        progress=lambda done: job.progress(done / total if total else 1.0, f"Summarized {done:,} of {total:,} responses..."))
+
 # Page selection in sidebar
 st.sidebar.title("Navigation")
 page_options = ["Travel Planner", "Cultural Pulse Dashboard", "Whispering Walls", "Arts & Culture Hub", "Social Survey", "Login/Signup"]
@@ -141,6 +362,42 @@ else:
     st.sidebar.info("Please login or signup to access all features.")
 
 page = st.sidebar.radio("Go to", page_options)
+
+session_jobs = job_queue.list_jobs(st.session_state.session_id, limit=5)
+if session_jobs:
+    with st.sidebar.expander("⏳ Background jobs"):
+        for job in session_jobs:
+            status = job["status"]
+            if status in jobs.ACTIVE_STATUSES:
+                status = f"{status} ({int(job['progress'] * 100)}%)"
+            st.caption(f"{JOB_LABELS.get(job['kind'], job['kind'])}: {status}")
+
+# Everyone sees their own spend; operators see the spend of every page and user.
+gemini_usage = gemini.scheduler.usage()
+if not is_admin():
+    gemini_usage = [row for row in gemini_usage if row["user"] == gemini_user()]
+if gemini_usage:
+    with st.sidebar.expander("📊 Gemini usage" if is_admin() else "📊 Your Gemini usage"):
+        usage_df = pd.DataFrame(gemini_usage)
+        usage_df["tokens"] = usage_df["prompt_tokens"] + usage_df["response_tokens"]
+        st.dataframe(usage_df.groupby("page")[["requests", "tokens"]].sum().sort_values("tokens", ascending=False))
+        st.caption(f"{usage_df['tokens'].sum():,} tokens in {usage_df['requests'].sum():,} requests")
+        if is_admin():
+            st.caption("Top users: " + ", ".join(f"{user} ({tokens:,} tokens)" for user, tokens in
+                       usage_df.groupby("user")["tokens"].sum().nlargest(5).items()))
+session_registry.report(st.session_state.session_id, memory.footprint(st.session_state.to_dict()))
+# Operator telemetry: only sessions of ADMIN_USERNAMES see the process-wide memory report.
+if is_admin():
+    with st.sidebar.expander("🧮 Memory"):
+        memory_summary = session_registry.summary()
+        blob_stats = blob_store.stats()
+        session_bytes = memory_summary["per_session"].get(st.session_state.session_id, 0)
+        st.caption(f"This session: {session_bytes / 1024:,.0f} KB · {memory_summary['sessions']} sessions: "
+                   f"{memory_summary['bytes'] / 1024 ** 2:,.1f} MB")
+        st.dataframe(pd.DataFrame({"KB": {name: round(size / 1024, 1) for name, size in memory_summary["by_type"].items()}})
+                     .sort_values("KB", ascending=False))
+        st.caption(f"Shared blobs: {blob_stats['blobs']} ({blob_stats['bytes'] / 1024 ** 2:,.1f} of "
+                   f"{blob_stats['max_bytes'] / 1024 ** 2:,.0f} MB), {blob_stats['evictions']} evicted")
 selected_page = params.get("page") or page
 
 if selected_page == "Login/Signup":
@@ -155,487 +412,401 @@ if selected_page == "Travel Planner":
     st.markdown("<div style='text-align: center;'>Plan your next adventure with AI-powered recommendations!<br>Made with ❤️ by Team Malaai (Machine Learning And AI)</div>", unsafe_allow_html=True)
     st.markdown("<div style='display: flex; justify-content: center; padding-top: 20px; padding-bottom: 20px;'>"
                 "<img src='https://i.ibb.co/gFZvVT9r/india-map.png' width='350'></div>", unsafe_allow_html=True)
-    
-    # Input fields
-    st.header("Tell us about your trip:")
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        current_location = st.text_input("📍 Current Location", "Bengaluru, India")
-
-    with col2:
-        destination = st.text_input("🗺️ Destination", "Goa, India")
-
-    with col3:
-        num_days = st.number_input("🗓️ Number of Days", min_value=1, max_value=30, value=5)
 
-    with col4:
-        interest = st.selectbox("🎯 Interest Type", ["Food", "Festivals", "Art", "Nature"])
-
-    if st.button("✨ Generate Travel Plan", type="primary"):
-        if not GEMINI_API_KEY:
-            st.error("Gemini API Key is not set! Please set the GEMINI_API_KEY environment variable.")
-        else:
-            with st.spinner("Generating your personalized travel plan... This might take a moment!"):
-                try:
-                    prompt = f"""
-                    You are an expert travel planner. I need a detailed travel plan for a trip from {current_location} to {destination} for {num_days} days focusing on {interest}.
-                    Please provide the information in a structured JSON format.
-
-                    The JSON should have the following keys:
-                    - "itinerary": An array of objects, each representing a day. Each day object should have:
-                        - "day": Integer (e.g., 1, 2)
-                        - "theme": String (e.g., "Beach Exploration", "Cultural Immersion")
-                        - "activities": An array of strings describing activities for that day.
-                        - "notes": String for any special considerations or tips for the day.
-                    - "recommended_places": An array of 3-5 strings listing key places in {destination} relevant to {interest}.
-                    - "food_outlets": An array of strings, listing 2-3 recommended restaurants with cuisine description.
-                    - "clothing_advice": A string providing clothing recommendations based on weather and activities.
-                    - "rush_info": A string with advice on crowded periods and avoidance tips.
-                    - "disclaimer": A string stating that real-time data requires external APIs.
-
-                    Ensure the JSON is valid and complete. Do not include any text outside the JSON block.
-                    """
-
-                    headers = {"Content-Type": "application/json"}
-                    payload = {
-                        "contents": [{
-                            "role": "user",
-                            "parts": [{"text": prompt}]
-                        }],
-                        "generationConfig": {"responseMimeType": "application/json"}
-                    }
-
-                    response = requests.post(f"{GEMINI_API_URL}?key={GEMINI_API_KEY}", headers=headers, json=payload)
-                    response.raise_for_status()
-
-                    result = response.json()
-                    if (result.get("candidates") and result["candidates"][0].get("content") and 
-                        result["candidates"][0]["content"].get("parts")):
-                        gemini_response_text = result["candidates"][0]["content"]["parts"][0]["text"]
-                        travel_plan = json.loads(gemini_response_text)
-
-                        st.success("Travel plan generated successfully!")
-                        st.subheader(f"✨ Your {num_days}-Day {interest} Trip to {destination} ✨")
-
-                        # Display Itinerary
-                        st.markdown("---")
-                        st.header("🗓️ Itinerary")
-                        for day_plan in travel_plan.get("itinerary", []):
-                            st.subheader(f"Day {day_plan.get('day')}: {day_plan.get('theme', '')}")
-                            for activity in day_plan.get("activities", []):
-                                st.write(f"- {activity}")
-                            if day_plan.get("notes"):
-                                st.info(f"📌 Notes: {day_plan['notes']}")
-                            st.markdown("---")
-
-                        # Display Recommended Places and Hotels
-                        if "recommended_places" in travel_plan and travel_plan["recommended_places"]:
-                            st.header("🏨 Recommended Places & Hotels")
-                            for place in travel_plan["recommended_places"]:
-                                st.subheader(f"Places to visit and stay near {place}")
-                                
-                                if RAPIDAPI_KEYS:  # List of API keys
-                                    success = False
-                                    for api_key in RAPIDAPI_KEYS:
-                                        try:
-                                            # Search hotels
-                                            url = f"https://{RAPIDAPI_HOST}/api/v1/hotels/searchDestination"
-                                            params = {"query": place.split("(")[0].strip()}
-                                            headers = {
-                                                "x-rapidapi-key": api_key,
-                                                "x-rapidapi-host": RAPIDAPI_HOST
-                                            }
-                                            resp = requests.get(url, headers=headers, params=params)
-                                            resp.raise_for_status()
-                                            hotels = resp.json().get("data", [])[:3]  # Show top 3
-
-                                            if hotels:
-                                                for hotel in hotels:
-                                                    if hotel.get("search_type") == "hotel":
-                                                        col1, col2 = st.columns([1, 3])
-                                                        with col1:
-                                                            st.image(hotel.get("image_url", ""), width=150)
-                                                        with col2:
-                                                            st.write(f"**{hotel.get('name')}**")
-                                                            st.caption(hotel.get("label", ""))
-                                                        st.markdown("---")
-                                            else:
-                                                st.warning(f"No hotels found near {place}")
-                                            success = True
-                                            break  # Exit loop on success
-                                        except Exception as e:
-                                            pass 
-                                    
-                                    if not success:
-                                        st.error("All RapidAPI keys failed. Unable to fetch hotel recommendations.")
-                                else:
-                                    st.warning("RapidAPI key(s) missing - cannot show hotel recommendations")
-
-                        # Display other sections
-                        st.header("🍽️ Food Recommendations")
-                        for food in travel_plan.get("food_outlets", []):
-                            st.write(f"- {food}")
-
-                        st.header("👕 Packing Advice")
-                        st.info(travel_plan.get("clothing_advice", ""))
-
-                        st.header("🚦 Crowd Management Tips")
-                        st.warning(travel_plan.get("rush_info", ""))
-
-                        # Crowd Calendar Visualization
-                        st.header("📅 Estimated Crowd Calendar")
-                        dates = pd.date_range(start=datetime.today(), periods=30, freq='D')
-                        df = pd.DataFrame({
-                            "Date": dates,
-                            "Crowd Level": np.random.randint(20, 100, size=len(dates))
-                        })
-                        chart = alt.Chart(df).mark_line().encode(
-                            x='Date:T',
-                            y='Crowd Level:Q',
-                            tooltip=['Date', 'Crowd Level']
-                        ).interactive()
-                        st.altair_chart(chart, use_container_width=True)
+    def build_crowd_calendar(destination):
+        dates = pd.date_range(start=datetime.today(), periods=30, freq='D')
+        return pd.DataFrame({
+            "Date": dates,
+            "Crowd Level": np.random.randint(20, 100, size=len(dates))
+        })
 
+    def render_travel_plan(trip, current_location, legs, interest):
+        travel_plan, trip_hotels = trip["plan"], trip["hotels"]
+        num_days = sum(days for _, days in legs)
+        destination = " → ".join(name for name, _ in legs)
+        st.subheader(f"✨ Your {num_days}-Day {interest} Trip to {destination} ✨")
+
+        # Display Itinerary
+        st.markdown("---")
+        st.header("🗓️ Itinerary")
+        for day_plan in travel_plan.get("itinerary", []):
+            day_label = f"Day {day_plan.get('day')}"
+            if day_plan.get("destination"):
+                day_label += f" ({day_plan['destination']})"
+            st.subheader(f"{day_label}: {day_plan.get('theme', '')}")
+            for activity in day_plan.get("activities", []):
+                st.write(f"- {activity}")
+            if day_plan.get("notes"):
+                st.info(f"📌 Notes: {day_plan['notes']}")
+            st.markdown("---")
+
+        # Display Recommended Places and Hotels
+        if "recommended_places" in travel_plan and travel_plan["recommended_places"]:
+            st.header("🏨 Recommended Places & Hotels")
+            for place in travel_plan["recommended_places"]:
+                st.subheader(f"Places to visit and stay near {place}")
+
+                if RAPIDAPI_KEYS:  # List of API keys
+                    hotels = trip_hotels.get(place)
+                    if hotels is None:
+                        st.error("All RapidAPI keys failed. Unable to fetch hotel recommendations.")
+                    elif hotels:
+                        for hotel in hotels:
+                            if hotel.get("search_type") == "hotel":
+                                col1, col2 = st.columns([1, 3])
+                                with col1:
+                                    st.image(compact_image(hotel.get("image_url", ""), HOTEL_IMAGE_WIDTH), width=HOTEL_IMAGE_WIDTH)
+                                with col2:
+                                    st.write(f"**{hotel.get('name')}**")
+                                    st.caption(hotel.get("label", ""))
+                                st.markdown("---")
                     else:
-                        st.error("Failed to generate valid travel plan")
+                        st.warning(f"No hotels found near {place}")
+                else:
+                    st.warning("RapidAPI key(s) missing - cannot show hotel recommendations")
+
+        # Display other sections
+        st.header("🍽️ Food Recommendations")
+        for food in travel_plan.get("food_outlets", []):
+            st.write(f"- {food}")
+
+        st.header("👕 Packing Advice")
+        st.info(travel_plan.get("clothing_advice", ""))
+
+        st.header("🚦 Crowd Management Tips")
+        st.warning(travel_plan.get("rush_info", ""))
+
+        # Crowd Calendar Visualization
+        st.header("📅 Estimated Crowd Calendar")
+        df = memoized("crowd_calendar", destination, compute=lambda: build_crowd_calendar(destination))
+        chart = alt.Chart(df).mark_line().encode(
+            x='Date:T',
+            y='Crowd Level:Q',
+            tooltip=['Date', 'Crowd Level']
+        ).interactive()
+        st.altair_chart(chart, use_container_width=True)
+
+    # Inputs and results live in one fragment: typing in a field only reruns this section, and the last
+    # generated plan is rendered from session state instead of being requested again.
+    @st.fragment
+    def travel_planner_section():
+        # Input fields
+        st.header("Tell us about your trip:")
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            current_location = st.text_input("📍 Current Location", "Bengaluru, India")
+
+        with col2:
+            destination = st.text_input("🗺️ Destination", "Goa, India")
+
+        with col3:
+            num_days = st.number_input("🗓️ Number of Days", min_value=1, max_value=30, value=5)
+
+        with col4:
+            interest = st.selectbox("🎯 Interest Type", planner.INTERESTS)
+
+        # Further stops turn the trip into a multi-destination itinerary; each stop reuses the cached day
+        # blocks of its destination.
+        legs = [(destination.strip(), int(num_days))]
+        with st.expander("🧭 Multi-destination trip"):
+            extra_stops = st.number_input("Additional destinations", min_value=0, max_value=4, value=0)
+            for i in range(int(extra_stops)):
+                col_stop, col_stop_days = st.columns([3, 1])
+                with col_stop:
+                    stop = st.text_input(f"🗺️ Destination {i + 2}", key=f"extra_destination_{i}")
+                with col_stop_days:
+                    stop_days = st.number_input("🗓️ Days", min_value=1, max_value=30, value=2, key=f"extra_days_{i}")
+                if stop.strip():
+                    legs.append((stop.strip(), int(stop_days)))
+
+        plan_inputs = (current_location.strip(), tuple(legs), interest)
+        # Results are keyed by canonical place names, so "Goa, India" and "goa" share one plan.
+        plan_key = (planner.canonical_place(plan_inputs[0], register=False),
+                    tuple((planner.canonical_place(name, register=False), days) for name, days in legs), interest)
+
+        col_generate, col_regenerate = st.columns([1, 1])
+        with col_generate:
+            generate_clicked = st.button("✨ Generate Travel Plan", type="primary")
+        with col_regenerate:
+            regenerate_clicked = st.button("🔄 Regenerate", disabled=memo_get("travel_plan", *plan_key) is None)
+
+        if regenerate_clicked:
+            memo_invalidate("travel_plan")
+            memo_invalidate("crowd_calendar")
+        if generate_clicked or regenerate_clicked:
+            if not GEMINI_API_KEY:
+                st.error("Gemini API Key is not set! Please set the GEMINI_API_KEY environment variable.")
+            else:
+                if memo_get("travel_plan", *plan_key) is None:
+                    # Regenerating also replaces the cached day blocks, so it must not share a plain job.
+                    job_key = plan_key + (regenerate_clicked,)
+                    memo_set("travel_plan_job", *plan_key,
+                             value=submit_job("travel_plan", job_key, run_travel_plan_job, *plan_inputs, regenerate_clicked,
+                                              reuse_done=not regenerate_clicked))
+                st.session_state.travel_plan_inputs = plan_inputs
+                st.session_state.travel_plan_key = plan_key
+
+        shown_inputs = st.session_state.get("travel_plan_inputs")
+        shown_key = st.session_state.get("travel_plan_key")
+        if not shown_inputs:
+            return
+        trip = memo_get("travel_plan", *shown_key)
+        if trip is None:
+            trip = job_result(memo_get("travel_plan_job", *shown_key), "Travel plan")
+            if trip is None:
+                return
+            memo_set("travel_plan", *shown_key, value=trip)
+            st.success("Travel plan generated successfully!")
+        if shown_key != plan_key:
+            st.caption("Showing your last generated plan. Click **Generate Travel Plan** to update it for the new inputs.")
+        try:
+            render_travel_plan(trip, *shown_inputs)
+        except Exception as e:
+            st.error(f"Error generating plan: {str(e)}")
 
-                except json.JSONDecodeError:
-                    st.error("Failed to parse travel plan response")
-                except Exception as e:
-                    st.error(f"Error generating plan: {str(e)}")
+    travel_planner_section()
 
 elif selected_page == "Cultural Pulse Dashboard":
     # Cultural Pulse Dashboard Page
     st.title("🌍 Cultural Pulse Dashboard – Season & Crowd Trends")
-    
-    # Top Filters Bar
-    st.header("Filter Insights")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        regions = ["Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal"]
-        selected_region = st.selectbox("Region", regions)
-    with col2:
-        months = ["January", "February", "March", "April", "May", "June",
-                 "July", "August", "September", "October", "November", "December"]
-        selected_month = st.selectbox("Month", months)
-    with col3:
-        main_interest = st.session_state.get('interest', 'Festivals')
-        interests = ["Festivals", "Art", "Food", "Nature"]
-        selected_interest = st.selectbox("Interest", interests, 
-                                         index=interests.index(main_interest) 
-                                         if main_interest in interests else 0)
-    
-    # Gemini API integration function
-    def get_gemini_data(prompt):
-        if not GEMINI_API_KEY:
-            st.error("Gemini API Key is not set!")
-            return None
-        headers = {"Content-Type": "application/json"}
-        payload = {
-            "contents": [{
-                "role": "user",
-                "parts": [{"text": prompt}]
-            }],
-            "generationConfig": {"responseMimeType": "application/json"}
-        }
-        try:
-            response = requests.post(f"{GEMINI_API_URL}?key={GEMINI_API_KEY}", headers=headers, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            if (result.get("candidates") 
-                and result["candidates"][0].get("content") 
-                and result["candidates"][0]["content"].get("parts")):
-                data_text = result["candidates"][0]["content"]["parts"][0]["text"]
-                return json.loads(data_text)
-            else:
-                st.error("Invalid response from Gemini API")
-        except Exception as e:
-            st.error(f"Error fetching data from Gemini API: {str(e)}")
-        return None
 
-    # Section 1 – Tourist Footfall using Gemini APIAdd commentMore actions
-    st.subheader("📈 Tourist Footfall Over the Year")
-    with st.spinner("Fetching tourist footfall data..."):
-        prompt_fp = f"""
-        Provide monthly tourist footfall data for the region "{selected_region}" for the year 2024.
-        The data should be a JSON with a key "footfall_data" that is a list of 12 objects.
-        Each object must contain:
-        - "month": a three-letter abbreviation (e.g., "Jan", "Feb", etc.)
-        - "visitors": an integer value representing the number of visitors.
-        """
-        gemini_fp = get_gemini_data(prompt_fp)
-    if gemini_fp and "footfall_data" in gemini_fp:
-        footfall_data = pd.DataFrame(gemini_fp["footfall_data"])
-        # Sort the months properly
-        month_order = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-                       "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        footfall_data['month'] = pd.Categorical(footfall_data['month'], categories=month_order, ordered=True)
-        footfall_data = footfall_data.sort_values('month')
-        st.line_chart(footfall_data.set_index("month"), use_container_width=True)
-    else:
-        st.error("Tourist footfall data not available.")
-
-    # Section 2 – Crowd Comparison using Gemini API
-    st.subheader("🏙️ Crowd Distribution Insights")
-    col1, col2 = st.columns(2)
-    
-    # Busy Locations using Gemini API
-    with col1:
-        st.markdown("**Most Busy Locations**")
-        with st.spinner("Fetching most busy locations..."):
-            prompt_busy = f"""
-            Provide a list of 5 most busy tourist locations in the region "{selected_region}" for people interested in "{selected_interest}".
-            The output must be a JSON with a key STRICTLY EQUAL TO "busy_places", which is a list of objects.
-            Each object should include:
-            - "location": name of the location.
-            - "crowd_percentage": an integer indicating the crowd level percentage.
-            """
-            gemini_busy = get_gemini_data(prompt_busy)
-        if gemini_busy and "busy_places" in gemini_busy:
-            busy_places = pd.DataFrame(gemini_busy["busy_places"])
-            busy_places = busy_places.rename(columns={"location": "Location", "crowd_percentage": "Crowd %"})
-            st.bar_chart(busy_places.set_index('Location'))
-        else:
-            st.error("Busy locations data not available.")
-    
-    # Quiet Locations using Gemini API
-    with col2:
-        st.markdown("**Hidden Gems**")
-        with st.spinner("Fetching hidden gems..."):
-            prompt_quiet = f"""
-            Provide a list of 5 lesser-known (hidden gem) tourist locations in the region "{selected_region}" for those interested in "{selected_interest}".
-            The output must be a JSON with a key "quiet_places", which is a list of objects.
-            Each object should include:
-            - "location": name of the location.
-            - "crowd_percentage": an integer indicating the crowd level percentage.
-            """
-            gemini_quiet = get_gemini_data(prompt_quiet)
-        if gemini_quiet and "quiet_places" in gemini_quiet:
-            quiet_places = pd.DataFrame(gemini_quiet["quiet_places"])
-            quiet_places = quiet_places.rename(columns={"location": "Location", "crowd_percentage": "Crowd %"})
-            st.bar_chart(quiet_places.set_index('Location'))
-        else:
-            st.error("Hidden gems data not available.")
-    
-    # Interaction Note
-    st.markdown("""
-    <div style='background: #f8f9fa; padding: 15px; border-radius: 10px; margin-top: 20px;'>
-        🔍 <strong>Pro Tip:</strong> Adjust the filters above to discover seasonal patterns 
-        and optimize your travel timing!
-    </div>
-    """, unsafe_allow_html=True)
-    
-    try:
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", 'B', 16)
-        pdf.cell(0, 10, "Cultural Pulse Dashboard Report", ln=1, align="C")
-        pdf.ln(5)
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, f"Region: {selected_region}", ln=1)
-        pdf.cell(0, 10, f"Month: {selected_month}", ln=1)
-        pdf.cell(0, 10, f"Interest: {selected_interest}", ln=1)
-        pdf.ln(10)
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "1. Tourist Footfall Over the Year", ln=1)
-        pdf.set_font("Arial", size=12)
+    # Filters and the sections that depend on them rerun together; the Cultural Grid below has no
+    # inputs and lives in its own fragment, so touching a filter never refetches it.
+    @st.fragment
+    def dashboard_insights_section():
+        # Top Filters Bar
+        st.header("Filter Insights")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            regions = culture.REGIONS
+            selected_region = st.selectbox("Region", regions)
+        with col2:
+            months = ["January", "February", "March", "April", "May", "June",
+                     "July", "August", "September", "October", "November", "December"]
+            selected_month = st.selectbox("Month", months)
+        with col3:
+            main_interest = st.session_state.get('interest', 'Festivals')
+            interests = ["Festivals", "Art", "Food", "Nature"]
+            selected_interest = st.selectbox("Interest", interests,
+                                             index=interests.index(main_interest)
+                                             if main_interest in interests else 0)
+
+        if st.button("🔄 Refresh insights", key="refresh_dashboard_insights"):
+            for section in ("footfall", "busy_places", "quiet_places", "dashboard_pdf", "dashboard_pdf_job"):
+                memo_invalidate(section)
+
+        # Section 1 – Tourist Footfall using Gemini API
+        st.subheader("📈 Tourist Footfall Over the Year")
+        with st.spinner("Fetching tourist footfall data..."):
+            prompt_fp = culture.build_footfall_prompt(selected_region)
+            gemini_fp = memoized("footfall", selected_region, compute=lambda: culture.expect_keys(get_gemini_data(prompt_fp), "footfall_data"), shared=True)
         if gemini_fp and "footfall_data" in gemini_fp:
-            for row in gemini_fp["footfall_data"]:
-                pdf.cell(0, 8, f"{row.get('month', '')}: {row.get('visitors', '')} visitors", ln=1)
+            footfall_data = pd.DataFrame(gemini_fp["footfall_data"])
+            # Sort the months properly
+            month_order = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                           "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+            footfall_data['month'] = pd.Categorical(footfall_data['month'], categories=month_order, ordered=True)
+            footfall_data = footfall_data.sort_values('month')
+            st.line_chart(footfall_data.set_index("month"), use_container_width=True)
         else:
-            pdf.cell(0, 8, "No data available", ln=1)
-        pdf.ln(8)
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "2. Most Busy Locations", ln=1)
-        pdf.set_font("Arial", size=12)
-        if gemini_busy and "busy_places" in gemini_busy:
-            for item in gemini_busy["busy_places"]:
-                pdf.cell(0, 8, f"{item.get('location', '')}: {item.get('crowd_percentage', '')}% crowd", ln=1)
-        else:
-            pdf.cell(0, 8, "No data available", ln=1)
-        pdf.ln(8)
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "3. Hidden Gems", ln=1)
-        pdf.set_font("Arial", size=12)
-        if gemini_quiet and "quiet_places" in gemini_quiet:
-            for item in gemini_quiet["quiet_places"]:
-                pdf.cell(0, 8, f"{item.get('location', '')}: {item.get('crowd_percentage', '')}% crowd", ln=1)
+            st.error("Tourist footfall data not available.")
+
+        # Section 2 – Crowd Comparison using Gemini API
+        st.subheader("🏙️ Crowd Distribution Insights")
+        col1, col2 = st.columns(2)
+
+        # Busy Locations using Gemini API
+        with col1:
+            st.markdown("**Most Busy Locations**")
+            with st.spinner("Fetching most busy locations..."):
+                prompt_busy = f"""
+                Provide a list of 5 most busy tourist locations in the region "{selected_region}" for people interested in "{selected_interest}".
+                The output must be a JSON with a key STRICTLY EQUAL TO "busy_places", which is a list of objects.
+                Each object should include:
+                - "location": name of the location.
+                - "crowd_percentage": an integer indicating the crowd level percentage.
+                """
+                gemini_busy = memoized("busy_places", selected_region, selected_interest, compute=lambda: culture.expect_keys(get_gemini_data(prompt_busy), "busy_places"), shared=True)
+            if gemini_busy and "busy_places" in gemini_busy:
+                busy_places = pd.DataFrame(gemini_busy["busy_places"])
+                busy_places = busy_places.rename(columns={"location": "Location", "crowd_percentage": "Crowd %"})
+                st.bar_chart(busy_places.set_index('Location'))
+            else:
+                st.error("Busy locations data not available.")
+
+        # Quiet Locations using Gemini API
+        with col2:
+            st.markdown("**Hidden Gems**")
+            with st.spinner("Fetching hidden gems..."):
+                prompt_quiet = f"""
+                Provide a list of 5 lesser-known (hidden gem) tourist locations in the region "{selected_region}" for those interested in "{selected_interest}".
+                The output must be a JSON with a key "quiet_places", which is a list of objects.
+                Each object should include:
+                - "location": name of the location.
+                - "crowd_percentage": an integer indicating the crowd level percentage.
+                """
+                gemini_quiet = memoized("quiet_places", selected_region, selected_interest, compute=lambda: culture.expect_keys(get_gemini_data(prompt_quiet), "quiet_places"), shared=True)
+            if gemini_quiet and "quiet_places" in gemini_quiet:
+                quiet_places = pd.DataFrame(gemini_quiet["quiet_places"])
+                quiet_places = quiet_places.rename(columns={"location": "Location", "crowd_percentage": "Crowd %"})
+                st.bar_chart(quiet_places.set_index('Location'))
+            else:
+                st.error("Hidden gems data not available.")
+
+        # Interaction Note
+        st.markdown("""
+        <div style='background: #f8f9fa; padding: 15px; border-radius: 10px; margin-top: 20px;'>
+            🔍 <strong>Pro Tip:</strong> Adjust the filters above to discover seasonal patterns
+            and optimize your travel timing!
+        </div>
+        """, unsafe_allow_html=True)
+
+        try:
+            # The report is built on the job queue and only rebuilt when one of its inputs changes; only
+            # complete reports are memoized.
+            report_inputs = (selected_region, selected_month, selected_interest)
+            pdf_output = memo_get("dashboard_pdf", *report_inputs)
+            if pdf_output is None:
+                job_id = memo_get("dashboard_pdf_job", *report_inputs)
+                if job_id is None:
+                    job_id = memo_set("dashboard_pdf_job", *report_inputs,
+                                      value=submit_job("dashboard_pdf", report_inputs, run_dashboard_pdf_job,
+                                                       *report_inputs, gemini_fp, gemini_busy, gemini_quiet))
+                pdf_output = job_result(job_id, "PDF report")
+                if pdf_output is not None and gemini_fp and gemini_busy and gemini_quiet:
+                    memo_set("dashboard_pdf", *report_inputs, value=pdf_output)
+            if pdf_output is not None:
+                st.markdown("<div style='padding-top:20px'>", unsafe_allow_html=True)
+                st.download_button("Download PDF Report", data=pdf_output, file_name="cultural_pulse_report.pdf")
+                st.markdown("</div>", unsafe_allow_html=True)
+        except Exception as e:
+            st.error(f"Error generating PDF: {e}")
+
+    @st.fragment
+    def cultural_grid_section():
+        st.subheader("🇮🇳 India's Cultural Grid – State-by-State Comparison")
+        st.markdown("Explore cultural statistics and trends across Indian states!")
+        st.markdown("This section provides a structured comparison of cultural data across various states in India, focusing on endangered art forms, festivals, tourist footfall, cultural revenue, accessibility scores, and government schemes.")
+        if st.button("🔄 Refresh grid", key="refresh_cultural_grid"):
+            memo_invalidate("cultural_grid")
+        with st.spinner("Fetching cultural comparison data..."):
+            prompt_grid = """
+            You are an expert on cultural statistics and trends in India. Provide a structured JSON response containing a list of cultural comparison data for various states/regions.
+            Each entry must include:
+            - "state_region": name of the state or region.
+            - "endangered_art_form": an endangered art form prevalent in that region.
+            - "festival_upcoming": name of an upcoming festival.
+            - "tourist_footfall": an estimated number of tourists.
+            - "cultural_revenue": cultural revenue in crore rupees (₹ Cr).
+            - "accessibility_score": a score from 1 to 10 representing cultural accessibility.
+            - "govt_scheme_active": "Yes" or "No" indicating if a relevant government scheme is active.
+            The JSON should have a single key "states_data" which is an array of these objects.
+            Do not include any additional commentary.
+            """
+            grid_data = memoized("cultural_grid", compute=lambda: culture.expect_keys(get_gemini_data(prompt_grid, priority=gemini.BULK), "states_data"),
+                                 shared=True)
+
+        if grid_data and "states_data" in grid_data:
+            df_grid = pd.DataFrame(grid_data["states_data"])
+            df_grid = df_grid.rename(columns={
+                "state_region": "State/Region",
+                "endangered_art_form": "Endangered Art Form",
+                "festival_upcoming": "Festival (Upcoming)",
+                "tourist_footfall": "Tourist Footfall",
+                "cultural_revenue": "Cultural Revenue (₹ Cr)",
+                "accessibility_score": "Accessibility Score",
+                "govt_scheme_active": "Govt. Scheme Active"
+            })
+            st.table(df_grid)
         else:
-            pdf.cell(0, 8, "No data available", ln=1)
-            
-        # Generate PDF in memory
-        pdf_output = pdf.output(dest='S').encode('latin1')
-        st.markdown("<div style='padding-top:20px'>", unsafe_allow_html=True)
-        st.download_button("Download PDF Report", data=pdf_output, file_name="cultural_pulse_report.pdf")
-        st.markdown("</div>", unsafe_allow_html=True)
-    except Exception as e:
-        st.error(f"Error generating PDF: {e}")
-
-    st.subheader("🇮🇳 India's Cultural Grid – State-by-State Comparison")
-    st.markdown("Explore cultural statistics and trends across Indian states!")
-    st.markdown("This section provides a structured comparison of cultural data across various states in India, focusing on endangered art forms, festivals, tourist footfall, cultural revenue, accessibility scores, and government schemes.")
-    # get_gemini_data is already defined in this scope, so no need to redefine
-    with st.spinner("Fetching cultural comparison data..."):
-        prompt_grid = """
-        You are an expert on cultural statistics and trends in India. Provide a structured JSON response containing a list of cultural comparison data for various states/regions.
-        Each entry must include:
-        - "state_region": name of the state or region.
-        - "endangered_art_form": an endangered art form prevalent in that region.
-        - "festival_upcoming": name of an upcoming festival.
-        - "tourist_footfall": an estimated number of tourists.
-        - "cultural_revenue": cultural revenue in crore rupees (₹ Cr).
-        - "accessibility_score": a score from 1 to 10 representing cultural accessibility.
-        - "govt_scheme_active": "Yes" or "No" indicating if a relevant government scheme is active.
-        The JSON should have a single key "states_data" which is an array of these objects.
-        Do not include any additional commentary.Add commentMore actions
-        """
-        grid_data = get_gemini_data(prompt_grid)
-
-    if grid_data and "states_data" in grid_data:
-        df_grid = pd.DataFrame(grid_data["states_data"])
-        df_grid = df_grid.rename(columns={
-            "state_region": "State/Region",
-            "endangered_art_form": "Endangered Art Form",
-            "festival_upcoming": "Festival (Upcoming)",
-            "tourist_footfall": "Tourist Footfall",
-            "cultural_revenue": "Cultural Revenue (₹ Cr)",
-            "accessibility_score": "Accessibility Score",
-            "govt_scheme_active": "Govt. Scheme Active"
-        })
-        st.table(df_grid)
-    else:
-        st.error("Failed to retrieve cultural comparison data for the grid.")
+            st.error("Failed to retrieve cultural comparison data for the grid.")
+
+    dashboard_insights_section()
+    cultural_grid_section()
 
 elif selected_page == "Whispering Walls":
     st.title("🗣️ Whispering Walls – Audio Stories of Heritage Sites")
     st.markdown("Click on a cultural site to hear its story, narrated like a local guide!")
 
-    cultural_sites_list = [
-        "Sanchi Stupa",
-        "Hampi",
-        "Taj Mahal",
-        "Mysore Palace",
-        "Qutub Minar",
-        "Red Fort",
-        "Victoria Memorial (Kolkata)",
-        "Konark Sun Temple",
-        "Khajuraho Temples",
-        "Fatehpur Sikri"
-    ]
-
-    selected_site = st.selectbox("Choose or type a cultural site:", cultural_sites_list + [""])
-    if selected_site == "":
-        typed_site = st.text_input("Or type the name of a cultural site:", "")
-        if typed_site:
-            selected_site = typed_site
-        else:
-            selected_site = None
-    elif selected_site is None:
-        pass
-
-    if selected_site:
-        st.subheader(f"Exploring {selected_site}")
-
-        def get_main_wikipedia_image_url(query):
-            try:
-                search_results = wikipedia.search(query, results=1)
-                if not search_results:
-                    return None
-                
-                page_title = search_results[0]
-                api_url = "https://en.wikipedia.org/w/api.php"
-                params = {
-                    "action": "query",
-                    "format": "json",
-                    "titles": page_title,
-                    "prop": "pageimages",
-                    "pithumbsize": 500,
-                    "redirects": 1
-                }
-                
-                response = requests.get(api_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                pages = data.get("query", {}).get("pages", {})
-                for page_id in pages:
-                    page_info = pages[page_id]
-                    if "thumbnail" in page_info:
-                        return page_info["thumbnail"]["source"]
-                    elif "original" in page_info.get("pageimageinfo", {}):
-                        return page_info["pageimageinfo"]["original"]["url"]
-                return None
-
-            except wikipedia.exceptions.DisambiguationError as e:
-                st.warning(f"Multiple results found for '{query}'. Trying the first option: {e.options[0]}.")
-                return get_main_wikipedia_image_url(e.options[0])
-            except wikipedia.exceptions.PageError:
-                st.warning(f"No Wikipedia page found for '{query}'.")
-                return None
-            except requests.exceptions.RequestException as e:
-                st.error(f"Network error while fetching image: {e}")
-                return None
-            except Exception as e:
-                st.error(f"An unexpected error occurred while fetching image: {e}")
-                return None
-
-        image_url = get_main_wikipedia_image_url(selected_site)
-        if image_url:
-            st.image(image_url, caption=selected_site, use_container_width=True)
-        else:
-            st.warning(f"Could not find a suitable image for {selected_site}.")
+    cultural_sites_list = culture.CULTURAL_SITES
 
-        if st.button(f"Listen to the story of {selected_site} 🔊", type="primary"):
-            if not GEMINI_API_KEY:
-                st.error("Gemini API Key is not set! Please set the GEMINI_API_KEY environment variable.")
+    def get_main_wikipedia_image_url(query):
+        try:
+            return culture.wikipedia_image_url(query, allow_original=True)
+        except wikipedia.exceptions.DisambiguationError as e:
+            st.warning(f"Multiple results found for '{query}'. Trying the first option: {e.options[0]}.")
+            return get_main_wikipedia_image_url(e.options[0])
+        except wikipedia.exceptions.PageError:
+            st.warning(f"No Wikipedia page found for '{query}'.")
+            return None
+        except requests.exceptions.RequestException as e:
+            st.error(f"Network error while fetching image: {e}")
+            return None
+        except Exception as e:
+            st.error(f"An unexpected error occurred while fetching image: {e}")
+            return None
+
+    # Site selection, image and story rerun as one fragment; the image and the generated story are
+    # memoized per site, so switching back to a site (or any other rerun) replays them without new API calls.
+    # Stories are generated on the job queue, so leaving the page does not lose one that is in progress.
+    @st.fragment
+    def whispering_walls_section():
+        selected_site = st.selectbox("Choose or type a cultural site:", cultural_sites_list + [""])
+        if selected_site == "":
+            typed_site = st.text_input("Or type the name of a cultural site:", "")
+            if typed_site:
+                selected_site = typed_site.strip()
             else:
-                with st.spinner(f"Generating audio story for {selected_site} using AI..."):
-                    try:
-                        prompt = f"""
-                        As a knowledgeable local guide, tell a short and engaging audio story (around 15 seconds when spoken) about the cultural significance, history, and key features of {selected_site} in a way that would captivate a visitor. Only write raw story text without any additional commentary or instructions.
-                        The story should be informative yet concise, suitable for a quick audio narration.
-                        """
-                        headers = {"Content-Type": "application/json"}
-                        payload = {
-                            "contents": [{
-                                "role": "user",
-                                "parts": [{"text": prompt}]
-                            }],
-                            "generationConfig": {"maxOutputTokens": 500}
-                        }
-                        response = requests.post(f"{GEMINI_API_URL}?key={GEMINI_API_KEY}", headers=headers, json=payload)
-                        response.raise_for_status()
-                        result = response.json()
-                        if (result.get("candidates") and result["candidates"][0].get("content") 
-                            and result["candidates"][0]["content"].get("parts")):
-                            story_text = result["candidates"][0]["content"]["parts"][0]["text"]
-
-                            waves_client = WavesClient(api_key=SMALLEST_API_KEY)
-                            waves_client.synthesize(
-                                text=story_text,
-                                save_as="audio_story.wav",
-                                voice_id="raj",
-                            )
-
-                            with open("audio_story.wav", "rb") as audio_file:
-                                audio_bytes = audio_file.read()
-                            st.audio(audio_bytes, format="audio/wav", start_time=0)
-                            os.remove("audio_story.wav")
-
-                            st.success("Enjoy the story!")
-                            st.markdown("---")
-                            st.subheader("Story Transcript:")
-                            st.write(story_text)
-                        else:
-                            st.error("Failed to generate the audio story.")
+                selected_site = None
+        elif selected_site is None:
+            pass
+
+        if selected_site:
+            st.subheader(f"Exploring {selected_site}")
+            # Typed names are matched against known sites, so "Hampi ruins" reuses the results for "Hampi".
+            site_key = culture.site_key(selected_site)
+
+            image_url = memoized("site_image", site_key, compute=lambda: get_main_wikipedia_image_url(selected_site), shared=True)
+            if image_url:
+                culture.site_key(selected_site, register=True) # A real site: let similar names reuse its results
+            if image_url:
+                st.image(compact_image(image_url, WIKIPEDIA_IMAGE_WIDTH), caption=selected_site, use_container_width=True)
+            else:
+                st.warning(f"Could not find a suitable image for {selected_site}.")
+
+            col_listen, col_regenerate = st.columns([1, 1])
+            with col_listen:
+                listen_clicked = st.button(f"Listen to the story of {selected_site} 🔊", type="primary")
+            with col_regenerate:
+                regenerate_clicked = st.button("🔄 New story", disabled=memo_get("audio_story", site_key) is None)
+
+            if regenerate_clicked:
+                memo_invalidate("audio_story")
+            if listen_clicked or regenerate_clicked:
+                if not GEMINI_API_KEY:
+                    st.error("Gemini API Key is not set! Please set the GEMINI_API_KEY environment variable.")
+                elif memo_get("audio_story", site_key) is None:
+                    memo_set("audio_story_job", site_key,
+                             value=submit_job("audio_story", site_key, run_audio_story_job, selected_site,
+                                              reuse_done=not regenerate_clicked))
+
+            story = memo_get("audio_story", site_key)
+            job_id = memo_get("audio_story_job", site_key)
+            if story is None and job_id is not None:
+                story = job_result(job_id, "Audio story")
+                if story is not None:
+                    memo_set("audio_story", site_key, value=story)
+                    culture.site_key(selected_site, register=True)
+                    st.success("Enjoy the story!")
+            if story:
+                story_text, audio_bytes = story
+                st.audio(audio_bytes, format="audio/wav", start_time=0)
+                st.markdown("---")
+                st.subheader("Story Transcript:")
+                st.write(story_text)
 
-                    except requests.exceptions.RequestException as e:
-                        st.error(f"Error communicating with Gemini API: {e}")
-                    except json.JSONDecodeError:
-                        st.error("Failed to decode Gemini API response.")
-                    except Exception as e:
-                        st.error(f"An unexpected error occurred: {e}")
+    whispering_walls_section()
 
     st.markdown("""
     <div style='background: #e6f7ff; padding: 15px; border-radius: 10px; margin-top: 20px;'>
@@ -650,102 +821,81 @@ elif selected_page == "Whispering Walls":
 
 elif selected_page == "Arts & Culture Hub":
     st.header("🖼️ India Arts & Culture Map")
-    state_names = [
-        "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh",
-        "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka",
-        "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya", "Mizoram",
-        "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana",
-        "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal"
-    ]
-    
-    st.markdown("### Select a state to explore its Arts & Culture")
-    selected_state = st.selectbox("Select a state", [""] + state_names)
-    if selected_state:
-        st.subheader(f"Famous Arts & Culture in {selected_state}")
-
-        language = st.selectbox("Select Language", ["English", "Hindi", "Tamil", "Telugu", "Bengali"])
-
-        def get_gemini_data(prompt):
-            if not GEMINI_API_KEY:
-                st.error("Gemini API Key is not set!")
-                return None
-            headers = {"Content-Type": "application/json"}
-            payload = {
-                "contents": [{
-                    "role": "user",
-                    "parts": [{"text": prompt}]
-                }],
-                "generationConfig": {"responseMimeType": "application/json"}
-            }
-            try:
-                response = requests.post(f"{GEMINI_API_URL}?key={GEMINI_API_KEY}", headers=headers, json=payload)
-                response.raise_for_status()
-                result = response.json()
-                if (result.get("candidates") and result["candidates"][0].get("content") and 
-                    result["candidates"][0]["content"].get("parts")):
-                    data_text = result["candidates"][0]["content"]["parts"][0]["text"]
-                    return json.loads(data_text)
-                else:
-                    st.error("Invalid response from Gemini API")
-            except Exception as e:
-                st.error(f"Error fetching data from Gemini API: {e}")
+    state_names = culture.STATE_NAMES
+
+    def get_wikipedia_image_url(query):
+        try:
+            return culture.wikipedia_image_url(query)
+        except Exception as e:
+            st.error(f"Error fetching image from Wikipedia: {e}")
             return None
 
-        def get_wikipedia_image_url(query):
-            try:
-                search_results = wikipedia.search(query, results=1)
-                if not search_results:
-                    return None
-                page_title = search_results[0]
-                api_url = "https://en.wikipedia.org/w/api.php"
-                params = {
-                    "action": "query",
-                    "format": "json",
-                    "titles": page_title,
-                    "prop": "pageimages",
-                    "pithumbsize": 500,
-                    "redirects": 1
-                }
-                resp = requests.get(api_url, params=params)
-                resp.raise_for_status()
-                data = resp.json()
-                pages = data.get("query", {}).get("pages", {})
-                for page_id in pages:
-                    page_info = pages[page_id]
-                    if "thumbnail" in page_info:
-                        return page_info["thumbnail"]["source"]
-                return None
-            except Exception as e:
-                st.error(f"Error fetching image from Wikipedia: {e}")
-                return None
-
-        arts_prompt = f"""
-        You are an expert on Indian arts and culture. Provide a structured JSON response 
-        with the famous arts, cultural events, and heritage highlights for the state "{selected_state}" in {language}.
-        The JSON must have:
-        - "description": a brief overview of the state's arts and culture.
-        - "highlights": a list of 3 to 5 strings naming famous landmarks, cultural festivals or art forms.
-        Do not include any extra commentary.
-        """
-        with st.spinner(f"Fetching arts & culture info for {selected_state}..."):
-            culture_data = get_gemini_data(arts_prompt)
-
-        if culture_data:
-            st.write(culture_data.get("description", "No description available."))
-
-            highlights = culture_data.get("highlights", [])
-            if highlights:
-                st.markdown("### Highlights")
-                for item in highlights:
-                    image_url = get_wikipedia_image_url(item)
-                    if image_url:
-                        st.image(image_url, caption=item, use_container_width=True)
-                    else:
-                        st.write(f"- {item}")
+    class CompactDeck(pdk.Deck):
+        """pydeck pretty-prints its JSON, which makes the state outlines about seven times larger on the wire."""
+        def to_json(self):
+            return json.dumps(self, sort_keys=True, default=default_serialize, separators=(",", ":"))
+
+    # Culture details are memoized per (state, language) and highlight images per highlight, so flipping
+    # the language selectbox back and forth only calls Gemini for combinations not seen yet.
+    @st.fragment
+    def arts_culture_section():
+        # The map is one precomputed payload: state outlines plus tooltips built from the cached arts & culture
+        # details, so hovering costs nothing and clicking a state selects it below.
+        state_tooltips = memoized("state_tooltips", culture.DEFAULT_LANGUAGE,
+                                  compute=lambda: culture.build_state_tooltips(results_cache), shared=True,
+                                  ttl=culture.STATE_TOOLTIPS_TTL_SECONDS)
+        map_event = st.pydeck_chart(CompactDeck(
+            layers=[pdk.Layer("GeoJsonLayer", culture.state_map(state_tooltips), id="states", pickable=True, auto_highlight=True,
+                              stroked=True, filled=True, get_fill_color="properties.fill_color",
+                              get_line_color=[255, 255, 255], line_width_min_pixels=1)],
+            initial_view_state=pdk.ViewState(latitude=22.5, longitude=82.5, zoom=3.6),
+            tooltip={"html": "<b>{name}</b><br/>{summary}<br/><i>{highlights}</i>"},
+            map_style=None,
+        ), on_select="rerun", selection_mode="single-object", key="arts_state_map", use_container_width=True)
+        picked = (map_event.selection.indices.get("states") or [None])[0]
+        if picked != st.session_state.get("arts_state_map_pick"):
+            st.session_state.arts_state_map_pick = picked
+            if picked is not None:
+                picked_state = culture.load_state_shapes()["features"][picked]["properties"]["name"]
+                if picked_state in state_names:
+                    st.session_state.arts_state = picked_state
+
+        st.markdown("### Select a state to explore its Arts & Culture")
+        selected_state = st.selectbox("Select a state", [""] + state_names, key="arts_state")
+        if selected_state:
+            st.subheader(f"Famous Arts & Culture in {selected_state}")
+
+            language = st.selectbox("Select Language", ["English", "Hindi", "Tamil", "Telugu", "Bengali"])
+            if st.button("🔄 Refresh", key="refresh_arts_culture"):
+                memo_invalidate("arts_culture")
+
+            arts_prompt = culture.build_arts_culture_prompt(selected_state, language)
+            with st.spinner(f"Fetching arts & culture info for {selected_state}..."):
+                culture_data, fetched = memoized_with_status(
+                    "arts_culture", selected_state, language, shared=True,
+                    compute=lambda: culture.expect_keys(get_gemini_data(arts_prompt), "description"))
+            if fetched and culture_data and language == culture.DEFAULT_LANGUAGE:
+                # The map tooltips are built from the cached English details: rebuild them to include this state.
+                memo_set("state_tooltips", culture.DEFAULT_LANGUAGE, value=culture.refresh_state_tooltips(results_cache))
+
+            if culture_data:
+                st.write(culture_data.get("description", "No description available."))
+
+                highlights = culture_data.get("highlights", [])
+                if highlights:
+                    st.markdown("### Highlights")
+                    for item in highlights:
+                        image_url = memoized("highlight_image", item, compute=lambda: get_wikipedia_image_url(item), shared=True)
+                        if image_url:
+                            st.image(compact_image(image_url, WIKIPEDIA_IMAGE_WIDTH), caption=item, use_container_width=True)
+                        else:
+                            st.write(f"- {item}")
+                else:
+                    st.warning("No highlights information found.")
             else:
-                st.warning("No highlights information found.")
-        else:
-            st.error("Failed to retrieve arts & culture details.")
+                st.error("Failed to retrieve arts & culture details.")
+
+    arts_culture_section()
 
 elif selected_page == "Social Survey":
     st.title("Social Survey")
@@ -866,34 +1016,159 @@ elif selected_page == "Social Survey":
                 except Exception as e:
                     st.error(f"Error saving survey to database: {e}")
 
+    # Bulk export of a creator's responses. The file is streamed to disk on the job queue in batches, so
+    # exporting even millions of responses runs in bounded memory and never renders them into the page.
+    if st.session_state.get("logged_in"):
+        st.markdown("---")
+        st.subheader("📥 Export Survey Responses")
+        try:
+            my_questions = surveys.creator_questions(surveys_collection, current_username)
+        except Exception as e:
+            st.error(f"Error fetching surveys: {e}")
+            my_questions = {}
+        if not my_questions:
+            st.info("Create a survey to export its responses.")
+        else:
+            col_scope, col_format = st.columns([3, 1])
+            with col_scope:
+                export_scope = st.selectbox("Surveys to export", ["all"] + list(my_questions),
+                                            format_func=lambda survey_id: "All my surveys" if survey_id == "all"
+                                            else my_questions[survey_id][:80],
+                                            key="export_scope")
+            with col_format:
+                export_format = surveys.EXPORT_FORMATS[st.radio("Format", list(surveys.EXPORT_FORMATS), key="export_format", horizontal=True)]
+            export_questions = my_questions if export_scope == "all" else {export_scope: my_questions[export_scope]}
+            export_inputs = (current_username, export_scope, export_format)
+
+            if st.button("Prepare Export", key="prepare_export_button"):
+                memo_set("survey_export_job", *export_inputs,
+                         value=submit_job("survey_export", export_inputs, run_survey_export_job, export_questions, export_format))
+
+            export_job_id = memo_get("survey_export_job", *export_inputs)
+            if export_job_id is not None:
+                export = job_result(export_job_id, "Survey export")
+                if export is not None:
+                    if not os.path.exists(export["path"]):
+                        st.warning("This export has expired. Please prepare it again.")
+                    elif os.path.getsize(export["path"]) <= EXPORT_DOWNLOAD_LIMIT_MB * 1024 * 1024:
+                        with open(export["path"], "rb") as export_file:
+                            st.download_button(f"Download {export['rows']:,} Response(s)", data=export_file,
+                                               file_name=os.path.basename(export["path"]), key="download_export_button")
+                    else:
+                        st.success(f"Exported {export['rows']:,} response(s). The file is too large to download here:")
+                        st.code(export["path"], language=None)
+
+    # Search runs in its own fragment against the MongoDB text indexes: typing a query or turning a page only
+    # reruns this section, and only one ranked page of results is fetched.
+    @st.fragment
+    def survey_search_section():
+        st.markdown("---")
+        st.subheader("🔎 Search Surveys")
+        search_query = st.text_input("Search survey questions and responses", key="survey_search_query",
+                                     placeholder="e.g. street food, Hampi, hidden gem")
+        col_scope, col_creator, col_from, col_to = st.columns([2, 2, 1, 1])
+        with col_scope:
+            search_in = st.radio("Search in", ["Survey questions", "Responses"], key="survey_search_scope", horizontal=True)
+        with col_creator:
+            creator_filter = st.text_input("Creator username (optional)", key="survey_search_creator",
+                                           value=current_username if st.session_state.get("logged_in") else "")
+        with col_from:
+            date_from = st.date_input("From", value=None, key="survey_search_from")
+        with col_to:
+            date_to = st.date_input("To", value=None, key="survey_search_to")
+
+        if not search_query.strip():
+            return
+
+        search_per_page = 5
+        def run_search(search_page):
+            if search_in == "Survey questions":
+                return surveys.search_surveys(surveys_collection, search_query.strip(), creator_filter.strip() or None,
+                                              date_from, date_to, page=search_page, per_page=search_per_page)
+            return surveys.search_responses(responses_collection_survey, surveys_collection, search_query.strip(),
+                                            creator_filter.strip() or None, date_from, date_to,
+                                            page=search_page, per_page=search_per_page)
+        try:
+            search_page = st.session_state.get("survey_search_page", 1)
+            results, total_results = run_search(search_page)
+            total_search_pages = max((total_results + search_per_page - 1) // search_per_page, 1)
+            if search_page > total_search_pages:
+                st.session_state.survey_search_page = search_page = 1
+                results, total_results = run_search(search_page)
+        except Exception as e:
+            st.error(f"Error searching surveys: {e}")
+            return
+
+        if not results:
+            st.info("No matching surveys found.")
+            return
+        st.caption(f"{total_results} match(es), best first.")
+        for result in results:
+            if search_in == "Survey questions":
+                st.markdown(f"**{result.get('question', 'N/A')}**")
+                caption_text = f"Survey ID: {result.get('survey_id', 'N/A')}"
+                if result.get("created_at"):
+                    caption_text += f" | Created: {result['created_at'].strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                caption_text += f" | By: {result.get('creator_username') or 'Anonymous (older survey)'}"
+            else:
+                st.markdown(f"**{result.get('responder_username') or 'Anonymous'}:** {result.get('response_text', 'N/A')}")
+                caption_text = f"On: {result.get('question') or result.get('survey_id', 'N/A')}"
+                if result.get("responded_at"):
+                    caption_text += f" | Responded at: {result['responded_at'].strftime('%Y-%m-%d %H:%M:%S UTC')}"
+            st.caption(caption_text)
+        st.number_input("Results page", min_value=1, max_value=total_search_pages, key="survey_search_page",
+                        help=f"Showing {search_per_page} results per page.")
+
+    survey_search_section()
+
+    # Each survey keeps a stored rolling summary, so showing it is a single document read. Updating it runs on
+    # the job queue and only sends Gemini the responses received since the last update.
+    @st.fragment
+    def survey_summary_section(survey_id, question, can_update):
+        if can_update and st.button("Update AI Summary", key=f"update_summary_{survey_id}"):
+            memo_set("survey_summary_job", survey_id,
+                     value=submit_job("survey_summary", survey_id, run_survey_summary_job, survey_id, question,
+                                          priority=gemini.BULK))
+        summary_job_id = memo_get("survey_summary_job", survey_id)
+        if summary_job_id is not None:
+            job_result(summary_job_id, "AI summary")
+        try:
+            summary = surveys.get_summary(summaries_collection, survey_id)
+        except Exception as e:
+            st.error(f"Error fetching the AI summary: {e}")
+            summary = None
+
+        if summary and summary.get("summary"):
+            with st.expander(f"🧠 AI Summary of {summary['responses_summarized']} response(s)"):
+                st.write(summary["summary"])
+                if summary.get("top_places"):
+                    st.markdown("**Most mentioned places:**")
+                    st.markdown("\n".join(f"{rank}. {place['name']} ({place['mentions']} mention(s))"
+                                           for rank, place in enumerate(summary["top_places"][:10], start=1)))
+                if summary.get("updated_at"):
+                    st.caption(f"Updated at: {summary['updated_at'].strftime('%Y-%m-%d %H:%M:%S UTC')}")
+
     st.markdown("---")
     st.subheader("Past Survey Responses")
 
+    # Surveys are paginated by the database: only the five surveys of the current page are fetched.
+    items_per_page = 5
+    survey_creator = current_username if st.session_state.get("logged_in") else None  # Logged-in users see their own surveys
+    current_page = st.session_state.get("pagination_survey_list", 1)
     try:
-        # Filter surveys by the creator's username if logged in, else show all surveys
-        if st.session_state.get("logged_in"):
-            username = current_username
-            all_surveys_cursor = surveys_collection.find({"creator_username": username}).sort("created_at", -1)
-        else:
-            all_surveys_cursor = surveys_collection.find().sort("created_at", -1)
-        all_surveys = list(all_surveys_cursor)
+        surveys_to_display, total_surveys = surveys.list_surveys(surveys_collection, survey_creator, current_page, items_per_page)
+        total_pages = max((total_surveys + items_per_page - 1) // items_per_page, 1)
+        if current_page > total_pages:
+            st.session_state.pagination_survey_list = current_page = 1
+            surveys_to_display, total_surveys = surveys.list_surveys(surveys_collection, survey_creator, current_page, items_per_page)
     except Exception as e:
         st.error(f"Error fetching surveys: {e}")
-        all_surveys = []
+        surveys_to_display, total_surveys, total_pages = [], 0, 1
 
-    if not all_surveys:
+    if not total_surveys:
         st.info("No surveys found.")
     else:
-        items_per_page = 5
-        total_surveys = len(all_surveys)
-        total_pages = (total_surveys + items_per_page - 1) // items_per_page
-        if total_pages == 0:
-            total_pages = 1
-
-        current_page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, key="pagination_survey_list", help=f"Showing {items_per_page} surveys per page.")
-        start_idx = (current_page - 1) * items_per_page
-        end_idx = start_idx + items_per_page
-        surveys_to_display = all_surveys[start_idx:end_idx]
+        st.number_input("Page", min_value=1, max_value=total_pages, key="pagination_survey_list", help=f"Showing {items_per_page} surveys per page.")
 
         if not surveys_to_display:
             st.info("No surveys on this page.")
@@ -914,6 +1189,8 @@ elif selected_page == "Social Survey":
                 else:
                     caption_text += " | By: Anonymous (older survey)"
                 st.caption(caption_text)
+                survey_summary_section(survey_id_display, survey_question,
+                                       can_update=st.session_state.get("logged_in") and creator_username_display == current_username)
 
                 try:
                     # Ensure responses_collection_survey is used
@@ -0,0 +1,235 @@
+"""Headless batch itinerary generation for travel desks.
+
+Reads (current_location, destination, num_days, interest) requests from a CSV or JSONL file and runs them
+through the same prompt and parsing as the Travel Planner page, with bounded concurrency. Every Gemini call
+the batch makes (an itinerary can take several) goes through a quota scheduler from gemini.py, on the budget
+window shared with the app: by default at bulk priority, or with the run's own --rpm limit. Every finished request is appended to a checkpoint file, so an interrupted batch
+resumes where it stopped. Hotel lookups are shared by every request in the batch that recommends the same
+place.
+
+Usage:
+    python batch.py requests.csv itineraries.jsonl --concurrency 4 --rpm 15
+    python batch.py requests.jsonl itineraries.parquet --no-hotels
+
+Or from Python:
+    import batch
+    summary = batch.run_batch(batch.load_requests("requests.csv"), "itineraries.jsonl")
+"""
+import argparse
+import contextvars
+import csv
+import json
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import requests
+from tqdm import tqdm
+
+import gemini
+import planner
+
+REQUEST_FIELDS = ("current_location", "destination", "num_days", "interest")
+
+
+class HotelLookups:
+    """Deduplicates hotel searches across a batch: each place is searched once, even when several
+    concurrent requests recommend it at the same time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def search(self, place):
+        key = place.split("(")[0].strip().lower()
+        with self._lock:
+            future = self._futures.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self._futures[key] = Future()
+        if is_owner:
+            try:
+                future.set_result(planner.search_hotels(place))
+            except Exception as e:  # Hand the error to every request waiting on this place, too
+                future.set_exception(e)
+        return future.result()
+
+    def __len__(self):
+        return len(self._futures)
+
+
+def normalize_request(row):
+    """Validates one input row and returns it with clean types. Raises ValueError on bad rows."""
+    missing = [field for field in REQUEST_FIELDS if not str(row.get(field) or "").strip()]
+    if missing:
+        raise ValueError(f"Missing field(s): {', '.join(missing)}")
+    num_days = int(row["num_days"])
+    if not 1 <= num_days <= 30:
+        raise ValueError("num_days must be between 1 and 30")
+    interest = str(row["interest"]).strip().capitalize()
+    if interest not in planner.INTERESTS:
+        raise ValueError(f"interest must be one of {', '.join(planner.INTERESTS)}")
+    return {
+        "current_location": str(row["current_location"]).strip(),
+        "destination": str(row["destination"]).strip(),
+        "num_days": num_days,
+        "interest": interest,
+    }
+
+
+def request_key(request):
+    """Identifies a request in checkpoints, so duplicate input rows are only generated once."""
+    return "|".join(str(request[field]).lower() for field in REQUEST_FIELDS)
+
+
+def load_requests(path):
+    """Reads raw request rows from a .csv (with a header row) or .jsonl file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_checkpoint(checkpoint_path):
+    """Returns the latest checkpointed record per request key (empty if there is no checkpoint yet)."""
+    records = {}
+    try:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record["key"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def generate_with_retries(request, max_retries=3):
+    """Generates one itinerary, backing off and retrying when Gemini rejects the call for quota
+    (HTTP 429) or has a transient server error."""
+    for attempt in range(max_retries + 1):
+        try:
+            return planner.generate_travel_plan(request["current_location"], request["destination"],
+                                                request["num_days"], request["interest"])
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if attempt == max_retries or not (status == 429 or (status or 0) >= 500):
+                raise
+            time.sleep(2 ** attempt * 5)
+
+
+def process_request(request, hotel_lookups):
+    record = {"key": request_key(request), **request, "generated_at": datetime.utcnow().isoformat()}
+    try:
+        with gemini.caller("Batch", priority=gemini.BULK):
+            travel_plan = generate_with_retries(request)
+        hotels = {}
+        if hotel_lookups is not None:
+            for place in travel_plan.get("recommended_places") or []:
+                hotels[place] = hotel_lookups.search(place)
+        record.update(status="ok", plan=travel_plan, hotels=hotels)
+    except Exception as e:
+        record.update(status="error", error=str(e) or type(e).__name__)
+    return record
+
+
+def write_results(records, output_path):
+    """Writes the final results as JSONL, or as Parquet (plan and hotels as JSON strings) for .parquet."""
+    if output_path.endswith(".parquet"):
+        import pandas as pd
+        rows = [{**record,
+                 "plan": json.dumps(record.get("plan"), ensure_ascii=False),
+                 "hotels": json.dumps(record.get("hotels"), ensure_ascii=False)} for record in records]
+        pd.DataFrame(rows).to_parquet(output_path, index=False)
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def run_batch(rows, output_path, concurrency=4, requests_per_minute=None, enrich_hotels=True, checkpoint_path=None):
+    """Generates an itinerary for every row and writes them to output_path (.jsonl or .parquet).
+
+    Without requests_per_minute, batch calls go through gemini.scheduler at bulk priority, so they leave
+    headroom in the GEMINI_RPM budget shared with the app. With it, the run gets its own scheduler on the same
+    shared window: a batch call starts only while fewer than requests_per_minute calls were made with the API
+    key in the last minute, by the batch and every other process on the host. Requests already completed in the
+    checkpoint (default: `<output_path>.checkpoint.jsonl`) are skipped, failed ones are retried. Returns a
+    summary dict with the number of ok, failed and skipped requests."""
+    if not gemini.GEMINI_API_KEY:
+        raise RuntimeError("Gemini API Key is not set! Please set the GEMINI_API_KEY environment variable.")
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint.jsonl"
+    done = {key: record for key, record in load_checkpoint(checkpoint_path).items() if record["status"] == "ok"}
+
+    ordered_keys, pending, invalid = [], {}, []
+    seen = set()
+    for row in rows:
+        try:
+            request = normalize_request(row)
+        except (ValueError, TypeError) as e:
+            invalid.append({"key": None, **{field: row.get(field) for field in REQUEST_FIELDS},
+                            "status": "error", "error": str(e)})
+            continue
+        key = request_key(request)
+        if key not in seen:
+            seen.add(key)
+            ordered_keys.append(key)
+            if key not in done:
+                pending[key] = request
+
+    run_scheduler = gemini.scheduler
+    if requests_per_minute:
+        run_scheduler = gemini.QuotaScheduler(requests_per_minute, gemini.GEMINI_TPM, store=gemini.scheduler.store,
+                                              budget_share={priority: 1.0 for priority in gemini.BUDGET_SHARE})
+    hotel_lookups = HotelLookups() if enrich_hotels else None
+    results = dict(done)
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        with gemini.use_scheduler(run_scheduler):  # Each worker runs in a copy of this context
+            futures = [executor.submit(contextvars.copy_context().run, process_request, request, hotel_lookups)
+                       for request in pending.values()]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Itineraries", unit="plan"):
+            record = future.result()
+            results[record["key"]] = record
+            checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+
+    records = [results[key] for key in ordered_keys] + invalid
+    write_results(records, output_path)
+    failed = sum(1 for record in records if record["status"] != "ok")
+    return {
+        "ok": len(records) - failed,
+        "failed": failed,
+        "skipped": len(ordered_keys) - len(pending),
+        "hotel_searches": len(hotel_lookups) if hotel_lookups is not None else 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Rangyatra travel itineraries in bulk.")
+    parser.add_argument("input", help="CSV or JSONL file with current_location, destination, num_days, interest")
+    parser.add_argument("output", help="Where to write the results (.jsonl or .parquet)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once (default: 4)")
+    parser.add_argument("--rpm", type=float, help="Only send a Gemini call while fewer than this many were made in "
+                                                  "the last minute, by this run and every other process on the "
+                                                  "host (default: the bulk share of GEMINI_RPM)")
+    parser.add_argument("--no-hotels", action="store_true", help="Skip hotel enrichment")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.jsonl)")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_batch(load_requests(args.input), args.output, concurrency=args.concurrency,
+                            requests_per_minute=args.rpm, enrich_hotels=not args.no_hotels,
+                            checkpoint_path=args.checkpoint)
+    except (OSError, RuntimeError, json.JSONDecodeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{summary['ok']} itineraries written to {args.output} ({summary['failed']} failed, "
+          f"{summary['skipped']} resumed from checkpoint, {summary['hotel_searches']} hotel searches).")
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
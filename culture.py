@@ -0,0 +1,195 @@
+"""Content behind the Cultural Pulse Dashboard, Whispering Walls and Arts & Culture Hub that does not depend on
+Streamlit: the hard-coded regions, states and heritage sites, the Gemini prompts, Wikipedia image lookups, the
+state map, and the startup warm-up that preloads their results into the shared cache."""
+import functools
+import html
+import json
+import os
+import sys
+
+import requests
+import wikipedia
+
+import gemini
+import semantic_cache
+
+REGIONS = ["Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal"]
+
+STATE_NAMES = [
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh",
+    "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka",
+    "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya", "Mizoram",
+    "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana",
+    "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal"
+]
+
+CULTURAL_SITES = [
+    "Sanchi Stupa",
+    "Hampi",
+    "Taj Mahal",
+    "Mysore Palace",
+    "Qutub Minar",
+    "Red Fort",
+    "Victoria Memorial (Kolkata)",
+    "Konark Sun Temple",
+    "Khajuraho Temples",
+    "Fatehpur Sikri"
+]
+
+DEFAULT_LANGUAGE = "English"
+
+# State outlines for the Arts & Culture map, simplified offline (topology-preserving, 0.03 degree tolerance,
+# coordinates rounded to 0.01 degree) from the MIT-licensed India map of echarts-countries-pypkg 0.1.6.
+INDIA_STATES_GEOJSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "india_states.geojson")
+MAP_FILL_COLOR = [230, 126, 34, 170]  # States with cached arts & culture details
+MAP_EMPTY_COLOR = [180, 180, 180, 90]
+STATE_TOOLTIPS_TTL_SECONDS = 3600  # Rebuilt whenever a state's details are fetched; the TTL bounds any misses
+
+
+def build_footfall_prompt(region):
+    return f"""
+    Provide monthly tourist footfall data for the region "{region}" for the year 2024.
+    The data should be a JSON with a key "footfall_data" that is a list of 12 objects.
+    Each object must contain:
+    - "month": a three-letter abbreviation (e.g., "Jan", "Feb", etc.)
+    - "visitors": an integer value representing the number of visitors.
+    """
+
+
+def build_arts_culture_prompt(state, language):
+    return f"""
+    You are an expert on Indian arts and culture. Provide a structured JSON response
+    with the famous arts, cultural events, and heritage highlights for the state "{state}" in {language}.
+    The JSON must have:
+    - "description": a brief overview of the state's arts and culture.
+    - "highlights": a list of 3 to 5 strings naming famous landmarks, cultural festivals or art forms.
+    Do not include any extra commentary.
+    """
+
+
+def expect_keys(result, *keys):
+    """Returns a Gemini JSON result if it is an object with a non-empty value for every expected key, else None.
+    Results are checked before they are cached, so a malformed answer is retried instead of shared."""
+    if isinstance(result, dict) and all(result.get(key) for key in keys):
+        return result
+    return None
+
+
+def site_key(site, register=False):
+    """The cache key of a heritage site; typed names are matched against the known sites ("Hampi ruins" -> "hampi").
+    An unknown site is only added to the index with register=True, once something has been generated for it, so
+    arbitrary typed names do not grow the index."""
+    index = semantic_cache.get_index("heritage_sites", seed=CULTURAL_SITES)
+    return index.canonicalize(site) if register else index.lookup(site)
+
+
+def wikipedia_image_url(query, allow_original=False):
+    """Returns the 500px thumbnail URL of the lead image of the best Wikipedia match for a query, or None.
+    With allow_original, falls back to the original image when a page has no thumbnail. Raises
+    wikipedia.exceptions.WikipediaException and requests.RequestException on lookup failures."""
+    search_results = wikipedia.search(query, results=1)
+    if not search_results:
+        return None
+
+    page_title = search_results[0]
+    api_url = "https://en.wikipedia.org/w/api.php"
+    params = {
+        "action": "query",
+        "format": "json",
+        "titles": page_title,
+        "prop": "pageimages",
+        "pithumbsize": 500,
+        "redirects": 1
+    }
+
+    response = requests.get(api_url, params=params, timeout=15)
+    response.raise_for_status()
+    data = response.json()
+
+    pages = data.get("query", {}).get("pages", {})
+    for page_id in pages:
+        page_info = pages[page_id]
+        if "thumbnail" in page_info:
+            return page_info["thumbnail"]["source"]
+        elif allow_original and "original" in page_info.get("pageimageinfo", {}):
+            return page_info["pageimageinfo"]["original"]["url"]
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def load_state_shapes():
+    with open(INDIA_STATES_GEOJSON, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_state_tooltips(cache, language=DEFAULT_LANGUAGE):
+    """Returns the map tooltip of every state outline, in the order of load_state_shapes(): HTML-escaped name,
+    summary and highlights plus a fill colour, built only from cached arts & culture results. States without
+    cached details are greyed out."""
+    tooltips = []
+    for feature in load_state_shapes()["features"]:
+        name = feature["properties"]["name"]
+        culture_data = cache.get("arts_culture", name, language) if name in STATE_NAMES else None
+        summary, highlights = "", ""
+        if isinstance(culture_data, dict):
+            summary = str(culture_data.get("description") or "")
+            if len(summary) > 160:
+                summary = summary[:160].rsplit(" ", 1)[0] + "…"
+            highlights = " · ".join(str(item) for item in culture_data.get("highlights") or [])
+        tooltips.append({
+            "name": html.escape(name),
+            "summary": html.escape(summary) if summary else "Select the state to explore its arts & culture.",
+            "highlights": html.escape(highlights),
+            "fill_color": MAP_FILL_COLOR if culture_data else MAP_EMPTY_COLOR,
+        })
+    return tooltips
+
+
+def state_map(tooltips):
+    """Combines the state outlines with their tooltips into the map's GeoJSON. The outlines are shared by every
+    session, so only the small tooltips need to be cached per language. A picked feature index is the index
+    of its state in load_state_shapes()."""
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "geometry": feature["geometry"], "properties": properties}
+        for feature, properties in zip(load_state_shapes()["features"], tooltips)]}
+
+
+def refresh_state_tooltips(cache, language=DEFAULT_LANGUAGE):
+    """Rebuilds the shared map tooltips from the cached details, e.g. after a state's details were fetched."""
+    return cache.set("state_tooltips", language, value=build_state_tooltips(cache, language),
+                     ttl=STATE_TOOLTIPS_TTL_SECONDS)
+
+
+# --- Cache warm-up ---
+def _warm(cache, section, *inputs, compute):
+    if cache.get(section, *inputs) is not None:
+        return False
+    try:
+        value = compute()
+    except Exception as e:
+        print(f"Cache warm-up of {section} {inputs} failed: {e}", file=sys.stderr)
+        return False
+    if value is not None:
+        cache.set(section, *inputs, value=value)
+    return value is not None
+
+
+def warm_cache(cache):
+    """Preloads the shared cache with the results every visitor of the hard-coded regions, states and heritage
+    sites would otherwise wait for: English arts & culture per state (and the state map built from it), footfall
+    per region and the image of each site. Entries already cached (e.g. by another process) are skipped, and
+    Gemini calls run at bulk priority so interactive pages go first. Returns the number of entries added."""
+    added = 0
+    for site in CULTURAL_SITES:
+        added += _warm(cache, "site_image", site_key(site), compute=lambda: wikipedia_image_url(site, allow_original=True))
+    if not gemini.GEMINI_API_KEY:
+        return added
+    with gemini.caller("Warm-up", priority=gemini.BULK):
+        for state in STATE_NAMES:
+            added += _warm(cache, "arts_culture", state, DEFAULT_LANGUAGE,
+                           compute=lambda: expect_keys(gemini.generate_json(build_arts_culture_prompt(state, DEFAULT_LANGUAGE)),
+                                                       "description"))
+        refresh_state_tooltips(cache)
+        for region in REGIONS:
+            added += _warm(cache, "footfall", region, compute=lambda: expect_keys(gemini.generate_json(build_footfall_prompt(region)), "footfall_data"))
+    return added
@@ -0,0 +1,270 @@
+"""Gemini REST client shared by the Streamlit pages, background jobs and batch tools.
+
+Every call goes through a quota scheduler, since all pages share a single API key. The scheduler estimates
+each call's prompt and response tokens and holds it until it fits the requests-per-minute and tokens-per-minute
+budgets; waiting calls are admitted in priority order, and bulk work may only use part of the budget, so
+interactive pages keep headroom when the quota runs low. The budget window and the spend, tallied per page and
+per user, are kept in a SQLite file (GEMINI_QUOTA_DB) shared by every process on the host, including batch runs. Callers describe themselves with `with gemini.caller(page, user, priority): ...`. Work that also caps
+its concurrent upstream calls (the job queue) passes its slot with `with gemini.upstream_slot(slot): ...`; a
+call takes the slot only once the scheduler has admitted it, so calls waiting for quota never hold one.
+
+Nothing in here touches Streamlit, so it is safe to call from worker threads."""
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing, contextmanager, nullcontext
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+GEMINI_RPM = int(os.environ.get("GEMINI_RPM") or 15)
+GEMINI_TPM = int(os.environ.get("GEMINI_TPM") or 1_000_000)
+# Budget window and spend shared by every process on this host. Processes on other hosts have their own, so
+# when the app runs on several hosts, divide GEMINI_RPM and GEMINI_TPM by the number of hosts.
+GEMINI_QUOTA_DB = os.environ.get("GEMINI_QUOTA_DB") or "gemini_quota.sqlite3"
+WINDOW_SECONDS = 60
+STORE_POLL_SECONDS = 1.0
+DEFAULT_RESPONSE_TOKENS = 2048
+REQUEST_TIMEOUT_SECONDS = 120  # Long answers take a while, but a hung request must not hold an upstream slot
+
+# Priorities, most urgent first. A priority may only fill its share of each per-minute budget.
+INTERACTIVE = 0  # The user is waiting on the answer (Travel Planner, Whispering Walls)
+NORMAL = 1
+BULK = 2  # Background and batch work (Cultural Grid, warm-ups, summaries, batch runs)
+BUDGET_SHARE = {INTERACTIVE: 1.0, NORMAL: 0.9, BULK: 0.6}
+
+
+class GeminiError(Exception):
+    """Raised when Gemini answers without a usable candidate."""
+
+
+def estimate_tokens(text):
+    """Rough token count for Gemini prompts (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class QuotaStore:
+    """The admission window and spend counters of every scheduler using the same SQLite file, so all processes
+    on a host (Streamlit workers, batch runs) draw on one budget and the spend survives restarts."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS quota_calls "
+                         "(call_id INTEGER PRIMARY KEY, started_at REAL NOT NULL, tokens INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS quota_usage (page TEXT NOT NULL, user TEXT NOT NULL, "
+                         "requests INTEGER NOT NULL, prompt_tokens INTEGER NOT NULL, response_tokens INTEGER NOT NULL, "
+                         "PRIMARY KEY (page, user))")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def admit(self, tokens, max_requests, max_tokens, now):
+        """Records a call if the window has room for it. Returns (call_id or None, start time of the oldest call
+        in the window or None)."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")  # Check and insert atomically across processes
+            try:
+                conn.execute("DELETE FROM quota_calls WHERE started_at <= ?", (now - WINDOW_SECONDS,))
+                count, used, oldest = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(tokens), 0), MIN(started_at) FROM quota_calls").fetchone()
+                call_id = None
+                if count < max_requests and (count == 0 or used + tokens <= max_tokens):
+                    call_id = conn.execute("INSERT INTO quota_calls (started_at, tokens) VALUES (?, ?)",
+                                           (now, tokens)).lastrowid
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return call_id, oldest
+
+    def settle(self, call_id, tokens, page, user, prompt_tokens, response_tokens):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE quota_calls SET tokens = ? WHERE call_id = ?", (tokens, call_id))
+            conn.execute("INSERT INTO quota_usage (page, user, requests, prompt_tokens, response_tokens) "
+                         "VALUES (?, ?, 1, ?, ?) ON CONFLICT (page, user) DO UPDATE SET requests = requests + 1, "
+                         "prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+                         "response_tokens = response_tokens + excluded.response_tokens",
+                         (page, user or "", prompt_tokens, response_tokens))
+            conn.execute("COMMIT")
+
+    def usage(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT page, user, requests, prompt_tokens, response_tokens FROM quota_usage").fetchall()
+        return [{"page": page, "user": user or None, "requests": requests, "prompt_tokens": prompt_tokens,
+                 "response_tokens": response_tokens} for page, user, requests, prompt_tokens, response_tokens in rows]
+
+
+class QuotaScheduler:
+    """Admits calls under per-minute request and token budgets, most urgent priority first. With a QuotaStore,
+    the budgets are shared with every other scheduler on that store; otherwise they cover this process only."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, budget_share=None, store=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.budget_share = budget_share or BUDGET_SHARE
+        self.store = store
+        self._cond = threading.Condition()
+        self._window = deque()  # [start_time, tokens] of each call admitted in the last minute (without a store)
+        self._waiting = []  # Heap of (priority, sequence) tickets
+        self._sequence = itertools.count()
+        self._usage = {}
+
+    def _admit(self, tokens, priority, now):
+        """Admits a call if it fits its priority's share of the budgets. Returns (window entry or None, time at
+        which to check again)."""
+        share = self.budget_share.get(priority, self.budget_share[BULK])
+        max_requests = max(int(self.requests_per_minute * share), 1)
+        max_tokens = self.tokens_per_minute * share
+        if self.store is not None:
+            call_id, oldest = self.store.admit(tokens, max_requests, max_tokens, now)
+            # Other processes free budget without notifying this one, so check again at least every poll interval.
+            retry_at = min(oldest + WINDOW_SECONDS, now + STORE_POLL_SECONDS) if oldest else now + STORE_POLL_SECONDS
+            return call_id, retry_at
+        while self._window and self._window[0][0] <= now - WINDOW_SECONDS:
+            self._window.popleft()
+        used = sum(entry[1] for entry in self._window)
+        if len(self._window) < max_requests and (not self._window or used + tokens <= max_tokens):
+            entry = [now, tokens]
+            self._window.append(entry)
+            return entry, None
+        return None, self._window[0][0] + WINDOW_SECONDS
+
+    def acquire(self, tokens, priority=NORMAL):
+        """Blocks until a call of about `tokens` tokens may start. Returns its window entry for settle()."""
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    retry_at = None
+                    if self._waiting[0] == ticket:
+                        now = time.time()
+                        entry, retry_at = self._admit(tokens, priority, now)
+                        if entry is not None:
+                            heapq.heappop(self._waiting)
+                            self._cond.notify_all()
+                            return entry
+                    # Wake up when budget may have freed up, or when the head of the queue changes.
+                    self._cond.wait(max(retry_at - time.time(), 0) if retry_at is not None else None)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+
+    def settle(self, entry, page, user, prompt_tokens, response_tokens):
+        """Replaces a call's estimate with its actual token count and adds it to the spend report."""
+        with self._cond:
+            if self.store is not None:
+                self.store.settle(entry, prompt_tokens + response_tokens, page, user, prompt_tokens, response_tokens)
+            else:
+                entry[1] = prompt_tokens + response_tokens
+                usage = self._usage.setdefault((page, user), {"requests": 0, "prompt_tokens": 0, "response_tokens": 0})
+                usage["requests"] += 1
+                usage["prompt_tokens"] += prompt_tokens
+                usage["response_tokens"] += response_tokens
+            self._cond.notify_all()
+
+    def usage(self):
+        """Returns the spend so far as rows of page, user, requests, prompt_tokens and response_tokens."""
+        if self.store is not None:
+            return self.store.usage()
+        with self._cond:
+            return [{"page": page, "user": user, **usage} for (page, user), usage in self._usage.items()]
+
+
+scheduler = QuotaScheduler(GEMINI_RPM, GEMINI_TPM, store=QuotaStore(GEMINI_QUOTA_DB))
+_caller = contextvars.ContextVar("gemini_caller", default=("Other", None, NORMAL))
+_upstream_slot = contextvars.ContextVar("gemini_upstream_slot", default=None)
+_scheduler = contextvars.ContextVar("gemini_scheduler", default=None)
+
+
+@contextmanager
+def caller(page, user=None, priority=NORMAL):
+    """Attributes the Gemini calls made inside the block to a page and user, at the given priority."""
+    token = _caller.set((page, user, priority))
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+@contextmanager
+def upstream_slot(slot):
+    """Makes each Gemini call inside the block hold `slot` (a context manager, e.g. a semaphore) during its
+    request, taken after the call has been admitted by the scheduler."""
+    token = _upstream_slot.set(slot)
+    try:
+        yield
+    finally:
+        _upstream_slot.reset(token)
+
+
+@contextmanager
+def use_scheduler(run_scheduler):
+    """Schedules the Gemini calls inside the block on another scheduler than the process-wide one, e.g. the
+    own budget of a batch run."""
+    token = _scheduler.set(run_scheduler)
+    try:
+        yield
+    finally:
+        _scheduler.reset(token)
+
+
+def current_scheduler():
+    return _scheduler.get() or scheduler
+
+
+def generate_text(prompt, generation_config=None):
+    """Sends a single-turn prompt to Gemini and returns the text of the first candidate."""
+    if not GEMINI_API_KEY:
+        raise GeminiError("Gemini API Key is not set!")
+    page, user, priority = _caller.get()
+    prompt_tokens = estimate_tokens(prompt)
+    response_tokens = (generation_config or {}).get("maxOutputTokens") or DEFAULT_RESPONSE_TOKENS
+    call_scheduler = current_scheduler()
+    entry = call_scheduler.acquire(prompt_tokens + response_tokens, priority)
+    headers = {"Content-Type": "application/json"}
+    payload = {
+        "contents": [{
+            "role": "user",
+            "parts": [{"text": prompt}]
+        }]
+    }
+    if generation_config:
+        payload["generationConfig"] = generation_config
+
+    try:
+        with _upstream_slot.get() or nullcontext():
+            response = requests.post(f"{GEMINI_API_URL}?key={GEMINI_API_KEY}", headers=headers, json=payload,
+                                     timeout=REQUEST_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        result = response.json()
+    except Exception:
+        call_scheduler.settle(entry, page, user, prompt_tokens, 0)
+        raise
+    usage = result.get("usageMetadata") or {}
+    call_scheduler.settle(entry, page, user, usage.get("promptTokenCount", prompt_tokens),
+                     usage.get("candidatesTokenCount", 0))
+    if (result.get("candidates")
+        and result["candidates"][0].get("content")
+        and result["candidates"][0]["content"].get("parts")):
+        return result["candidates"][0]["content"]["parts"][0]["text"]
+    raise GeminiError("Invalid response from Gemini API")
+
+
+def generate_json(prompt):
+    """Like generate_text, but asks for a JSON response and returns it parsed."""
+    return json.loads(generate_text(prompt, {"responseMimeType": "application/json"}))
@@ -0,0 +1,102 @@
+"""Compact local copies of remote images (Wikipedia thumbnails, hotel photos).
+
+Each (URL, display width) is downloaded once, downscaled to the width it is shown at and transcoded to WebP
+(or JPEG) with Pillow, then kept in a size-bounded disk cache shared by every session. Pages serve these bytes
+instead of pointing browsers at the third-party hosts, so clients only ever download the small version.
+When the cache grows past its limit, the least recently served files are deleted first."""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from PIL import Image, ImageOps
+
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "rangyatra_images")
+IMAGE_CACHE_MAX_MB = float(os.environ.get("IMAGE_CACHE_MAX_MB") or 200)
+IMAGE_FORMAT = (os.environ.get("IMAGE_FORMAT") or "WEBP").upper()  # WEBP or JPEG
+IMAGE_QUALITY = {"WEBP": 75, "JPEG": 80}
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+HEADERS = {"User-Agent": "Rangyatra/1.0 (image cache)"}  # Wikimedia rejects requests without a User-Agent
+FAILURE_RETRY_SECONDS = 600
+
+_evict_lock = threading.Lock()
+_fetch_locks = [threading.Lock() for _ in range(64)]  # Striped by cache path
+_failures = {}  # Cache path -> time of the last failed fetch, so broken images are not retried on every rerun
+
+
+def _cache_path(url, width, fmt):
+    digest = hashlib.sha256(f"{url}|{width}|{fmt}|{IMAGE_QUALITY[fmt]}".encode()).hexdigest()
+    return os.path.join(IMAGE_CACHE_DIR, f"{digest}.{fmt.lower()}")
+
+
+def transcode(data, width, fmt=IMAGE_FORMAT):
+    """Downscales image bytes to at most `width` pixels wide and re-encodes them as WebP or JPEG."""
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            image = image.resize((width, max(round(image.height * width / image.width), 1)), Image.LANCZOS)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha and fmt == "WEBP" else "RGB")
+        out = io.BytesIO()
+        if fmt == "WEBP":
+            image.save(out, fmt, quality=IMAGE_QUALITY[fmt], method=4)
+        else:
+            image.save(out, fmt, quality=IMAGE_QUALITY[fmt], optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _evict():
+    """Deletes the least recently served files until the cache fits IMAGE_CACHE_MAX_MB."""
+    entries = []
+    for entry in os.scandir(IMAGE_CACHE_DIR):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    limit = IMAGE_CACHE_MAX_MB * 1024 * 1024
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def get_image(url, width, fmt=IMAGE_FORMAT):
+    """Returns the compact bytes for an image URL shown `width` pixels wide, fetching and transcoding it on
+    first use. Raises requests.RequestException, ValueError or PIL errors when the image cannot be fetched or
+    decoded; a failed image is not fetched again for FAILURE_RETRY_SECONDS."""
+    path = _cache_path(url, width, fmt)
+    with _fetch_locks[hash(path) % len(_fetch_locks)]:  # Concurrent requests for the same image download it once
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Mark as recently served for eviction
+            return data
+        except FileNotFoundError:
+            pass
+        if time.monotonic() - _failures.get(path, float("-inf")) < FAILURE_RETRY_SECONDS:
+            raise ValueError(f"Image recently failed to load: {url}")
+        try:
+            response = requests.get(url, headers=HEADERS, timeout=15)
+            response.raise_for_status()
+            if len(response.content) > MAX_SOURCE_BYTES:
+                raise ValueError(f"Image too large: {url}")
+            data = transcode(response.content, width, fmt)
+        except Exception:
+            _failures[path] = time.monotonic()
+            raise
+        _failures.pop(path, None)
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    with _evict_lock:
+        _evict()
+    return data
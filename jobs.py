@@ -0,0 +1,177 @@
+"""Local background job queue for long-running generation tasks.
+
+Jobs run on a thread pool, and their status, progress and pickled result are kept in a SQLite job table.
+Work therefore survives the user navigating to another page: the page keeps only the job ID and polls it
+when the user comes back. A shared semaphore caps how many upstream API calls the workers of one process
+make at the same time.
+
+Several processes may share one job table. Each queue records its instance ID on the jobs it runs and
+refreshes their heartbeat while they are active; active jobs whose heartbeat has gone stale belonged to a
+process that stopped, and are marked failed by whichever queue notices first."""
+import contextvars
+import pickle
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+HEARTBEAT_SECONDS = 15
+STALE_AFTER_SECONDS = 90  # Active jobs without a heartbeat for this long are considered interrupted
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    job_key TEXT NOT NULL,
+    owner TEXT,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result BLOB,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    instance_id TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_kind_key ON jobs (kind, job_key, status);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created_at);
+CREATE TABLE IF NOT EXISTS job_owners (
+    job_id TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (owner, job_id)
+);
+"""
+
+
+class JobContext:
+    """Handed to every job function as its first argument."""
+
+    def __init__(self, queue, job_id):
+        self._queue = queue
+        self.job_id = job_id
+
+    def progress(self, fraction, message=""):
+        """Records how far along the job is (0.0 - 1.0) with a short status message."""
+        self._queue._update(self.job_id, progress=min(max(float(fraction), 0.0), 1.0), message=message)
+
+    def upstream(self):
+        """Context manager to hold around each upstream API call, e.g. `with job.upstream(): ...`."""
+        return self._queue.upstream_calls
+
+
+class JobQueue:
+    def __init__(self, db_path="jobs.sqlite3", max_workers=4, max_upstream_calls=2, retention_seconds=24 * 3600):
+        self.db_path = db_path
+        self.upstream_calls = threading.BoundedSemaphore(max_upstream_calls)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rangyatra-job")
+        self._lock = threading.Lock()
+        self.instance_id = str(uuid.uuid4())
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("instance_id", "TEXT"), ("heartbeat_at", "REAL")):  # Tables of older versions
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            self._fail_stale(conn)
+            conn.execute("DELETE FROM jobs WHERE updated_at < ?", (time.time() - retention_seconds,))
+            conn.execute("DELETE FROM job_owners WHERE job_id NOT IN (SELECT job_id FROM jobs)")
+            conn.execute("INSERT OR IGNORE INTO job_owners (job_id, owner, created_at) "  # Jobs of older versions
+                         "SELECT job_id, owner, created_at FROM jobs WHERE owner IS NOT NULL")
+        threading.Thread(target=self._heartbeat, name="rangyatra-job-heartbeat", daemon=True).start()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _fail_stale(self, conn):
+        """Marks failed the active jobs of other instances whose heartbeat is stale: their process stopped and
+        they will never finish."""
+        now = time.time()
+        conn.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?) "
+                     "AND (instance_id IS NULL OR instance_id != ?) AND COALESCE(heartbeat_at, updated_at) < ?",
+                     (FAILED, "Interrupted by a server restart. Please try again.", now, *ACTIVE_STATUSES,
+                      self.instance_id, now - STALE_AFTER_SECONDS))
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(HEARTBEAT_SECONDS)
+            try:
+                with self._lock, closing(self._connect()) as conn, conn:
+                    conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE instance_id = ? AND status IN (?, ?)",
+                                 (time.time(), self.instance_id, *ACTIVE_STATUSES))
+                    self._fail_stale(conn)
+            except sqlite3.Error:
+                traceback.print_exc()
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def submit(self, kind, key, fn, *args, owner=None, reuse_done=False, **kwargs):
+        """Queues fn(job_context, *args, **kwargs) and returns the job ID.
+
+        If a job with the same kind and key is already queued or running, its ID is returned instead (and the
+        job is listed for this owner too), so repeated clicks (or several users asking for the same thing)
+        share one upstream computation. With
+        reuse_done, a finished job with the same kind and key is reused as well, which makes the job table
+        a cache of results for the retention period."""
+        job_key = repr(key)
+        statuses = ACTIVE_STATUSES + ((DONE,) if reuse_done else ())
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute(f"SELECT job_id FROM jobs WHERE kind = ? AND job_key = ? "
+                               f"AND status IN ({', '.join('?' * len(statuses))}) ORDER BY created_at DESC",
+                               (kind, job_key, *statuses)).fetchone()
+            job_id = row[0] if row else str(uuid.uuid4())
+            if owner is not None:
+                conn.execute("INSERT OR IGNORE INTO job_owners (job_id, owner, created_at) VALUES (?, ?, ?)",
+                             (job_id, owner, now))
+            if row:
+                return job_id
+            conn.execute("INSERT INTO jobs (job_id, kind, job_key, owner, status, created_at, updated_at, instance_id, "
+                         "heartbeat_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (job_id, kind, job_key, owner, QUEUED, now, now, self.instance_id, now))
+        # Run in a copy of the submitter's context, so context variables (e.g. the Gemini caller) carry over.
+        self._executor.submit(contextvars.copy_context().run, self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status=RUNNING)
+        try:
+            result = fn(JobContext(self, job_id), *args, **kwargs)
+            self._update(job_id, status=DONE, progress=1.0, result=pickle.dumps(result))
+        except Exception as e:  # Including unpicklable results, so a job never stays running
+            traceback.print_exc()
+            self._update(job_id, status=FAILED, error=str(e) or type(e).__name__)
+
+    def get(self, job_id):
+        """Returns the job as a dict (with the unpickled result once it is done), or None if unknown."""
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = pickle.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def list_jobs(self, owner, limit=10):
+        """Returns the jobs an owner most recently submitted or joined, newest first, without their results."""
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT jobs.job_id, kind, status, progress, message, error, jobs.created_at, updated_at "
+                                "FROM job_owners JOIN jobs ON jobs.job_id = job_owners.job_id "
+                                "WHERE job_owners.owner = ? ORDER BY job_owners.created_at DESC LIMIT ?",
+                                (owner, limit)).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,178 @@
+"""Memory accounting for Streamlit sessions, and a shared store for the large payloads they would otherwise hold.
+
+Session state is per user, so every audio story, PDF report or image a session keeps is multiplied by the number
+of open sessions. Payloads above BLOB_MIN_BYTES are therefore moved into one process-wide, content-addressed
+BlobStore, and sessions keep only a small BlobRef: identical content is stored once however many sessions use
+it, and the store evicts the least recently used blobs beyond BLOB_STORE_MAX_MB. A session whose blob was
+evicted sees a cache miss and recomputes or reloads it (e.g. from the job table).
+
+footprint() estimates what a session holds per object type; each session reports it to the SessionRegistry on
+every run, which aggregates the per-session and per-type totals for the whole process."""
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+BLOB_STORE_MAX_MB = float(os.environ.get("BLOB_STORE_MAX_MB") or 256)
+BLOB_MIN_BYTES = 32 * 1024
+SESSION_REPORT_MAX_AGE = 3600  # Sessions that have not rerun for this long are dropped from the totals
+
+BlobRef = namedtuple("BlobRef", ["digest", "size"])
+
+
+class BlobStore:
+    """Immutable byte strings keyed by their SHA-256, with LRU eviction beyond max_bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._blobs = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def put(self, data):
+        data = bytes(data)
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if digest in self._blobs:
+                self._blobs.move_to_end(digest)
+            else:
+                self._blobs[digest] = data
+                self.size += len(data)
+                while self.size > self.max_bytes and len(self._blobs) > 1:
+                    _, evicted = self._blobs.popitem(last=False)
+                    self.size -= len(evicted)
+                    self.evictions += 1
+        return BlobRef(digest, len(data))
+
+    def get(self, ref):
+        """Returns the blob's bytes, or None if it has been evicted."""
+        with self._lock:
+            data = self._blobs.get(ref.digest)
+            if data is None:
+                self.misses += 1
+                return None
+            self._blobs.move_to_end(ref.digest)
+            self.hits += 1
+            return data
+
+    def stats(self):
+        with self._lock:
+            return {"blobs": len(self._blobs), "bytes": self.size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class _Evicted(Exception):
+    pass
+
+
+def store_blobs(store, value):
+    """Returns value with every large bytes object (also inside tuples, lists and dicts) replaced by a BlobRef."""
+    if isinstance(value, (bytes, bytearray)) and len(value) >= BLOB_MIN_BYTES:
+        return store.put(value)
+    if isinstance(value, tuple) and not isinstance(value, BlobRef):
+        return tuple(store_blobs(store, item) for item in value)
+    if isinstance(value, list):
+        return [store_blobs(store, item) for item in value]
+    if isinstance(value, dict):
+        return {key: store_blobs(store, item) for key, item in value.items()}
+    return value
+
+
+def _load(store, value):
+    if isinstance(value, BlobRef):
+        data = store.get(value)
+        if data is None:
+            raise _Evicted()
+        return data
+    if isinstance(value, tuple):
+        return tuple(_load(store, item) for item in value)
+    if isinstance(value, list):
+        return [_load(store, item) for item in value]
+    if isinstance(value, dict):
+        return {key: _load(store, item) for key, item in value.items()}
+    return value
+
+
+def load_blobs(store, value):
+    """Reverses store_blobs. Returns None if any of the value's blobs has been evicted."""
+    try:
+        return _load(store, value)
+    except _Evicted:
+        return None
+
+
+# --- Accounting ---
+def deep_sizeof(obj, seen=None):
+    """Estimates the memory held by an object and everything it references (each object counted once)."""
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if hasattr(item, "memory_usage") and hasattr(item, "dtypes"):  # pandas DataFrame or Series
+            usage = item.memory_usage(deep=True)
+            size += int(usage.sum() if hasattr(usage, "sum") else usage)
+            continue
+        if hasattr(item, "nbytes") and hasattr(item, "dtype"):  # NumPy array
+            size += max(sys.getsizeof(item), int(item.nbytes))
+            continue
+        size += sys.getsizeof(item, 0)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return size
+
+
+def footprint(state):
+    """Returns {object type: bytes} for the values of a session state dict. Memoized results (the _memo dict)
+    are broken down by the type of each result; payloads moved to the BlobStore count as BlobRef."""
+    by_type = {}
+    seen = set()
+
+    def add(value):
+        name = type(value).__name__
+        by_type[name] = by_type.get(name, 0) + deep_sizeof(value, seen)
+
+    for key, value in state.items():
+        if key == "_memo" and isinstance(value, dict):
+            for memo_value in value.values():
+                add(memo_value)
+        else:
+            add(value)
+    return by_type
+
+
+class SessionRegistry:
+    """The latest footprint reported by each session of this process."""
+
+    def __init__(self, max_age=SESSION_REPORT_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def report(self, session_id, by_type):
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (now, by_type)
+            for stale in [sid for sid, (reported_at, _) in self._sessions.items() if reported_at < now - self.max_age]:
+                del self._sessions[stale]
+
+    def summary(self):
+        """Returns the number of sessions, their total bytes, the bytes per object type and per session."""
+        with self._lock:
+            sessions = {sid: dict(by_type) for sid, (_, by_type) in self._sessions.items()}
+        by_type = {}
+        for session_by_type in sessions.values():
+            for name, size in session_by_type.items():
+                by_type[name] = by_type.get(name, 0) + size
+        per_session = {sid: sum(session_by_type.values()) for sid, session_by_type in sessions.items()}
+        return {"sessions": len(sessions), "bytes": sum(per_session.values()), "by_type": by_type,
+                "per_session": per_session}
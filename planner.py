@@ -0,0 +1,249 @@
+"""Travel Planner logic: itinerary composition from cached day blocks, and hotel lookups."""
+import json
+import os
+import threading
+
+import requests
+from dotenv import load_dotenv
+
+import gemini
+import semantic_cache
+import shared_cache
+
+load_dotenv()
+
+RAPIDAPI_KEY = os.environ.get("RAPIDAPI_KEY", "")
+RAPIDAPI_KEY_1 = os.environ.get("RAPIDAPI_KEY_1", "")
+RAPIDAPI_KEY_2 = os.environ.get("RAPIDAPI_KEY_2", "")
+RAPIDAPI_KEYS = [RAPIDAPI_KEY, RAPIDAPI_KEY_1, RAPIDAPI_KEY_2]
+RAPIDAPI_HOST = "booking-com15.p.rapidapi.com"
+
+INTERESTS = ["Food", "Festivals", "Art", "Nature"]
+
+
+# --- Day blocks ---
+# Itineraries are assembled from reusable per-(destination, interest) day blocks instead of being written from
+# scratch for every request: "5 days in Goa for Food" and "4 days in Goa for Food" share their first four
+# blocks. Blocks are generated so that the first N of them always make a good N-day stay, and are cached
+# together with a per-destination guide (places, food, packing, crowds). Gemini is only asked for blocks a
+# trip needs beyond what is cached, plus short connecting notes that depend on the traveller's route.
+DISCLAIMER = ("Crowd levels, weather and hotel availability change constantly. Real-time data requires external "
+              "APIs, so please verify details before you travel.")
+
+# Day blocks, guides and connecting notes are kept in the shared results cache (see shared_cache.py), so every
+# session, process and host behind the same CACHE_BACKEND reuses them. The canonical names of the planned
+# destinations are stored there too, to seed the place index of each new process.
+_cache = None
+_places = None
+_cache_lock = threading.Lock()
+_key_locks = {}
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = shared_cache.from_env()
+        return _cache
+
+
+def _remember_destination(place):
+    """Adds a newly planned destination to the stored list that seeds the place index."""
+    destinations = get_cache().get("planner_destinations") or []
+    if place not in destinations:
+        get_cache().set("planner_destinations", value=destinations + [place])
+
+
+def _key_lock(key):
+    """One lock per cache key, so concurrent requests for the same destination generate its blocks once."""
+    with _cache_lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def canonical_place(place, register=True):
+    """Maps free-text place names onto one key ("Goa, India", "goa" and "North Goa" -> "goa"), so that
+    near-duplicate queries share cached blocks. The index is seeded with every destination already cached.
+    With register=False, an unknown place is not added to the index (for keys computed while the user types)."""
+    global _places
+    if _places is None:
+        seed = get_cache().get("planner_destinations") or []
+        with _cache_lock:
+            if _places is None:
+                _places = semantic_cache.get_index("places", seed=seed)
+    return _places.canonicalize(place) if register else _places.lookup(place)
+
+
+def destination_key(destination, interest):
+    return canonical_place(destination), interest.lower()
+
+
+def build_day_blocks_prompt(destination, interest, start_day, count, covered_themes, include_guide):
+    covered = ""
+    if covered_themes:
+        covered = f"Days 1-{start_day - 1} are already planned and cover: {'; '.join(covered_themes)}. Do not repeat them."
+    guide = ""
+    if include_guide:
+        guide = f"""
+    - "recommended_places": An array of 3-5 strings listing key places in {destination} relevant to {interest}.
+    - "food_outlets": An array of strings, listing 2-3 recommended restaurants with cuisine description.
+    - "clothing_advice": A string providing clothing recommendations based on weather and activities.
+    - "rush_info": A string with advice on crowded periods and avoidance tips."""
+    return f"""
+    You are an expert travel planner. Plan days {start_day} to {start_day + count - 1} of a stay in {destination} focusing on {interest}.
+    {covered}
+    Each day must start and end in {destination} and must not mention travelling to or from it. Put the must-see
+    highlights in the earliest days, so that the first N days always make a good N-day trip on their own.
+    Please provide the information in a structured JSON format.
+
+    The JSON should have the following keys:
+    - "days": An array of exactly {count} objects, in order. Each day object should have:
+        - "theme": String (e.g., "Beach Exploration", "Cultural Immersion")
+        - "activities": An array of strings describing activities for that day.
+        - "notes": String for any special considerations or tips for the day.{guide}
+
+    Ensure the JSON is valid and complete. Do not include any text outside the JSON block.
+    """
+
+
+def build_connecting_notes_prompt(current_location, legs, interest):
+    route = " then ".join(f"{destination} ({num_days} days)" for destination, num_days in legs)
+    return f"""
+    You are an expert travel planner. A traveller interested in {interest} starts in {current_location} and visits {route}.
+    Please provide the information in a structured JSON format.
+
+    The JSON should have the following keys:
+    - "arrival": A string with tips for getting from {current_location} to {legs[0][0]} and for the arrival day.
+    - "transfers": An array of exactly {len(legs) - 1} strings, one per move between consecutive destinations, with tips for that journey.
+
+    Ensure the JSON is valid and complete. Do not include any text outside the JSON block.
+    """
+
+
+def parse_day_blocks(text, count):
+    """Parses Gemini's JSON answer for a run of day blocks. Raises json.JSONDecodeError on malformed JSON
+    and ValueError when the answer does not hold the requested days."""
+    data = json.loads(text)
+    days = data.get("days") if isinstance(data, dict) else None
+    if not isinstance(days, list) or len(days) < count or not all(isinstance(day, dict) for day in days):
+        raise ValueError("Failed to generate valid travel plan")
+    return data
+
+
+def _generate_json_text(prompt):
+    return gemini.generate_text(prompt, {"responseMimeType": "application/json"})
+
+
+def get_destination(destination, interest, num_days, refresh=False):
+    """Returns the cached guide and at least num_days day blocks for (destination, interest), asking Gemini
+    only for the blocks that are missing. With refresh, the cached blocks are discarded and regenerated."""
+    key = destination_key(destination, interest)
+    cache = get_cache()
+    with _key_lock(key):
+        entry = None if refresh else cache.get("day_blocks", *key)
+        entry = entry or {"guide": None, "days": []}
+        missing = num_days - len(entry["days"])
+        if missing > 0 or entry["guide"] is None:
+            count = max(missing, 1)
+            start_day = len(entry["days"]) + 1
+            prompt = build_day_blocks_prompt(destination, interest, start_day, count,
+                                             [day.get("theme", "") for day in entry["days"]],
+                                             include_guide=entry["guide"] is None)
+            data = parse_day_blocks(_generate_json_text(prompt), count)
+            entry["days"].extend({field: day.get(field, "" if field != "activities" else [])
+                                  for field in ("theme", "activities", "notes")} for day in data["days"][:count])
+            if entry["guide"] is None:
+                entry["guide"] = {field: data.get(field) for field in
+                                  ("recommended_places", "food_outlets", "clothing_advice", "rush_info")}
+                _remember_destination(key[0])
+            cache.set("day_blocks", *key, value=entry)
+    return entry["guide"], entry["days"][:num_days]
+
+
+def get_connecting_notes(current_location, legs, interest, refresh=False):
+    key = [canonical_place(current_location), interest.lower()] + [canonical_place(destination) for destination, _ in legs]
+    cache = get_cache()
+    notes = None if refresh else cache.get("connecting_notes", *key)
+    if notes is None:
+        notes = json.loads(_generate_json_text(build_connecting_notes_prompt(current_location, legs, interest)))
+        if not isinstance(notes, dict):
+            raise ValueError("Failed to generate valid travel plan")
+        cache.set("connecting_notes", *key, value=notes)
+    return notes
+
+
+def compose_itinerary(current_location, legs, interest, refresh=False):
+    """Assembles a travel plan for one or more (destination, num_days) legs from cached day blocks.
+
+    The result has the same shape the Travel Planner has always rendered ("itinerary", "recommended_places",
+    "food_outlets", "clothing_advice", "rush_info", "disclaimer"), plus "legs" describing which days belong
+    to which destination. A destination visited twice (Goa -> Hampi -> Goa) is planned once for its total
+    days, and each visit gets the next days of it; its guide is only included once."""
+    legs = [(destination.strip(), int(num_days)) for destination, num_days in legs]
+    notes = get_connecting_notes(current_location, legs, interest, refresh=refresh)
+    transfers = notes.get("transfers") or []
+    multi = len(legs) > 1
+
+    total_days = {}
+    for destination, num_days in legs:
+        place = canonical_place(destination)
+        total_days[place] = total_days.get(place, 0) + num_days
+    planned, days_used = {}, {}
+
+    travel_plan = {"itinerary": [], "recommended_places": [], "food_outlets": [], "legs": []}
+    clothing, rush = [], []
+    for i, (destination, num_days) in enumerate(legs):
+        place = canonical_place(destination)
+        revisit = place in planned
+        if not revisit:
+            planned[place] = get_destination(destination, interest, total_days[place], refresh=refresh)
+        guide, all_days = planned[place]
+        days = all_days[days_used.get(place, 0):days_used.get(place, 0) + num_days]
+        days_used[place] = days_used.get(place, 0) + num_days
+        start_day = len(travel_plan["itinerary"]) + 1
+        travel_plan["legs"].append({"destination": destination, "start_day": start_day, "num_days": num_days})
+        for offset, block in enumerate(days):
+            day_plan = {"day": start_day + offset, **block}
+            if multi:
+                day_plan["destination"] = destination
+            if offset == 0:
+                connecting = notes.get("arrival") if i == 0 else (transfers[i - 1] if i - 1 < len(transfers) else "")
+                if connecting:
+                    day_plan["notes"] = f"{connecting} {day_plan.get('notes', '')}".strip()
+            travel_plan["itinerary"].append(day_plan)
+        if revisit:
+            continue
+        travel_plan["recommended_places"].extend(guide.get("recommended_places") or [])
+        travel_plan["food_outlets"].extend(guide.get("food_outlets") or [])
+        prefix = f"{destination}: " if multi else ""
+        if guide.get("clothing_advice"):
+            clothing.append(prefix + guide["clothing_advice"])
+        if guide.get("rush_info"):
+            rush.append(prefix + guide["rush_info"])
+
+    travel_plan["clothing_advice"] = "\n\n".join(clothing)
+    travel_plan["rush_info"] = "\n\n".join(rush)
+    travel_plan["disclaimer"] = DISCLAIMER
+    return travel_plan
+
+
+def generate_travel_plan(current_location, destination, num_days, interest, refresh=False):
+    return compose_itinerary(current_location, [(destination, num_days)], interest, refresh=refresh)
+
+
+def search_hotels(place):
+    """Returns the top hotel search results near a place, or None if every RapidAPI key failed."""
+    for api_key in RAPIDAPI_KEYS:
+        try:
+            # Search hotels
+            url = f"https://{RAPIDAPI_HOST}/api/v1/hotels/searchDestination"
+            query_params = {"query": place.split("(")[0].strip()}
+            headers = {
+                "x-rapidapi-key": api_key,
+                "x-rapidapi-host": RAPIDAPI_HOST
+            }
+            resp = requests.get(url, headers=headers, params=query_params, timeout=15)
+            resp.raise_for_status()
+            return resp.json().get("data", [])[:3]  # Show top 3
+        except Exception:
+            pass
+    return None
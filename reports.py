@@ -0,0 +1,45 @@
+"""PDF reports offered for download on the Cultural Pulse Dashboard."""
+from fpdf import FPDF
+
+
+def build_dashboard_pdf(selected_region, selected_month, selected_interest, gemini_fp, gemini_busy, gemini_quiet):
+    """Renders the dashboard insights into a PDF and returns its bytes."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, "Cultural Pulse Dashboard Report", ln=1, align="C")
+    pdf.ln(5)
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, f"Region: {selected_region}", ln=1)
+    pdf.cell(0, 10, f"Month: {selected_month}", ln=1)
+    pdf.cell(0, 10, f"Interest: {selected_interest}", ln=1)
+    pdf.ln(10)
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "1. Tourist Footfall Over the Year", ln=1)
+    pdf.set_font("Arial", size=12)
+    if gemini_fp and "footfall_data" in gemini_fp:
+        for row in gemini_fp["footfall_data"]:
+            pdf.cell(0, 8, f"{row.get('month', '')}: {row.get('visitors', '')} visitors", ln=1)
+    else:
+        pdf.cell(0, 8, "No data available", ln=1)
+    pdf.ln(8)
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "2. Most Busy Locations", ln=1)
+    pdf.set_font("Arial", size=12)
+    if gemini_busy and "busy_places" in gemini_busy:
+        for item in gemini_busy["busy_places"]:
+            pdf.cell(0, 8, f"{item.get('location', '')}: {item.get('crowd_percentage', '')}% crowd", ln=1)
+    else:
+        pdf.cell(0, 8, "No data available", ln=1)
+    pdf.ln(8)
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "3. Hidden Gems", ln=1)
+    pdf.set_font("Arial", size=12)
+    if gemini_quiet and "quiet_places" in gemini_quiet:
+        for item in gemini_quiet["quiet_places"]:
+            pdf.cell(0, 8, f"{item.get('location', '')}: {item.get('crowd_percentage', '')}% crowd", ln=1)
+    else:
+        pdf.cell(0, 8, "No data available", ln=1)
+
+    # Generate PDF in memory
+    return pdf.output(dest='S').encode('latin1')
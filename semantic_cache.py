@@ -0,0 +1,110 @@
+"""Maps near-duplicate free-text queries onto one canonical cache key.
+
+Users type the same place in many ways ("Goa, India", "goa", "North Goa"; "Hampi" vs "Hampi ruins"), which
+defeats exact-key caching. Queries are first normalized (case, accents, punctuation and generic words such as
+"India" or "ruins"), then compared against the canonical keys seen so far with a character n-gram index: each
+key is a hashed, L2-normalized trigram count vector, so one NumPy matrix-vector product scores a query against
+every key. A query whose best cosine similarity reaches the threshold reuses that key; otherwise it becomes a
+new canonical key. Everything is local and CPU-only."""
+import os
+import re
+import threading
+import unicodedata
+import zlib
+
+import numpy as np
+
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD") or 0.8)
+VECTOR_DIM = 2048
+NGRAM = 3
+
+# Words that qualify a place without changing which cached result answers it.
+GENERIC_WORDS = {
+    "india", "the", "of", "in", "at", "near", "city", "town", "district", "state",
+    "north", "south", "east", "west", "central", "ruins", "ruin", "site", "monument", "monuments",
+}
+
+
+def normalize(text):
+    """Lowercases, strips accents and punctuation, and drops generic words ("Goa, India" -> "goa")."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
+    words = re.sub(r"[^a-z0-9]+", " ", text).split()
+    core = [word for word in words if word not in GENERIC_WORDS]
+    return " ".join(core or words)
+
+
+def embed(normalized):
+    """Hashed character trigram counts of a normalized query, L2-normalized."""
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    padded = f" {normalized} "
+    for i in range(max(len(padded) - NGRAM + 1, 1)):
+        vector[zlib.crc32(padded[i:i + NGRAM].encode()) % VECTOR_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CanonicalIndex:
+    """An in-process index of canonical keys for one kind of query (destinations, heritage sites, ...)."""
+
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, seed=()):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._keys = []
+        self._lookup = {}
+        self._matrix = np.zeros((16, VECTOR_DIM), dtype=np.float32)
+        for text in seed:
+            self.canonicalize(text)
+
+    def _add(self, key):
+        if len(self._keys) == len(self._matrix):
+            self._matrix = np.vstack([self._matrix, np.zeros_like(self._matrix)])
+        self._matrix[len(self._keys)] = embed(key)
+        self._lookup[key] = key
+        self._keys.append(key)
+
+    def _best(self, key):
+        if key in self._lookup:
+            return self._lookup[key], 1.0
+        if not self._keys:
+            return None, 0.0
+        scores = self._matrix[:len(self._keys)] @ embed(key)
+        best = int(np.argmax(scores))
+        return self._keys[best], float(scores[best])
+
+    def match(self, text):
+        """Returns (canonical_key, similarity) of the closest known key, or (None, 0.0) if there is none."""
+        with self._lock:
+            return self._best(normalize(text))
+
+    def lookup(self, text):
+        """Returns the canonical key a query would map to, without registering it."""
+        key = normalize(text)
+        with self._lock:
+            canonical, score = self._best(key)
+        return canonical if canonical is not None and score >= self.threshold else key
+
+    def canonicalize(self, text):
+        """Returns the canonical key for a query, registering it as a new key when nothing is similar enough."""
+        key = normalize(text)
+        with self._lock:
+            canonical, score = self._best(key)
+            if canonical is not None and score >= self.threshold:
+                self._lookup[key] = canonical
+                return canonical
+            self._add(key)
+            return key
+
+    def __len__(self):
+        return len(self._keys)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(namespace, seed=()):
+    """Returns the process-wide index for a namespace, creating (and seeding) it on first use."""
+    with _indexes_lock:
+        if namespace not in _indexes:
+            _indexes[namespace] = CanonicalIndex(seed=seed)
+        return _indexes[namespace]
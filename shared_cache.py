@@ -0,0 +1,152 @@
+"""Cache of generated results shared across sessions, restarts and Streamlit processes.
+
+Values are stored as JSON under namespaced keys ("rangyatra:v1:<section>:<inputs>"), so every backend holds the
+same bytes for the same entry and a format change only needs a version bump. Backends are interchangeable:
+
+- "memory": a bounded in-process LRU (lost on restart, not shared between processes);
+- "sqlite": a table in a local SQLite file (survives restarts, shared by the processes on one host);
+- "redis": any Redis-protocol server (shared by every process behind a load balancer; needs the redis package).
+
+Pick one with CACHE_BACKEND and CACHE_URL (a SQLite path or a redis:// URL). Backend failures are reported and
+treated as cache misses, so an unavailable cache never breaks a page."""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+CACHE_BACKEND = (os.environ.get("CACHE_BACKEND") or "sqlite").lower()
+CACHE_URL = os.environ.get("CACHE_URL") or ""
+CACHE_NAMESPACE = os.environ.get("CACHE_NAMESPACE") or "rangyatra"
+CACHE_TTL_SECONDS = int(os.environ.get("CACHE_TTL_SECONDS") or 7 * 24 * 3600)
+CACHE_VERSION = 1  # Bump when the shape of cached values changes
+MAX_KEY_LENGTH = 200
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl if ttl else None, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteBackend:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS shared_cache "
+                         "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)")
+            conn.execute("DELETE FROM shared_cache WHERE expires_at <= ?", (time.time(),))
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, key):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM shared_cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                               (key, time.time())).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO shared_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                         (key, value, time.time() + ttl if ttl else None))
+
+    def delete(self, key):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM shared_cache WHERE key = ?", (key,))
+
+
+class RedisBackend:
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=5, socket_connect_timeout=5)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, value, ex=ttl or None)
+
+    def delete(self, key):
+        self._client.delete(key)
+
+
+class SharedCache:
+    """JSON values keyed by (section, *inputs), e.g. cache.get("footfall", "Goa")."""
+
+    def __init__(self, backend, namespace=CACHE_NAMESPACE, ttl=CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def key(self, section, *inputs):
+        encoded = json.dumps(inputs, ensure_ascii=False, separators=(",", ":"), default=str)
+        if len(encoded) > MAX_KEY_LENGTH:
+            encoded = hashlib.sha256(encoded.encode()).hexdigest()
+        return f"{self.namespace}:v{CACHE_VERSION}:{section}:{encoded}"
+
+    def get(self, section, *inputs):
+        """Returns the cached value, or None on a miss (or when the backend is unavailable)."""
+        try:
+            data = self.backend.get(self.key(section, *inputs))
+        except Exception as e:
+            print(f"Shared cache read failed: {e}", file=sys.stderr)
+            return None
+        return json.loads(data) if data is not None else None
+
+    def set(self, section, *inputs, value, ttl=None):
+        """Stores a JSON-serializable value and returns it."""
+        data = json.dumps(value, ensure_ascii=False, sort_keys=True).encode()
+        try:
+            self.backend.set(self.key(section, *inputs), data, ttl or self.ttl)
+        except Exception as e:
+            print(f"Shared cache write failed: {e}", file=sys.stderr)
+        return value
+
+    def delete(self, section, *inputs):
+        try:
+            self.backend.delete(self.key(section, *inputs))
+        except Exception as e:
+            print(f"Shared cache delete failed: {e}", file=sys.stderr)
+
+
+def create_backend(name=CACHE_BACKEND, url=CACHE_URL):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend(url or "shared_cache.sqlite3")
+    if name == "redis":
+        return RedisBackend(url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown CACHE_BACKEND {name!r} (expected memory, sqlite or redis)")
+
+
+def from_env():
+    """Returns a SharedCache on the backend configured by CACHE_BACKEND and CACHE_URL."""
+    return SharedCache(create_backend())
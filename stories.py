@@ -0,0 +1,41 @@
+"""Whispering Walls audio stories: Gemini writes the story, Smallest.ai's Waves narrates it."""
+import os
+import threading
+
+from dotenv import load_dotenv
+from smallestai.waves import WavesClient
+
+load_dotenv()
+
+SMALLEST_API_KEY = os.environ.get("SMALLEST_API_KEY", "")
+SYNTHESIS_TIMEOUT_SECONDS = 60
+
+
+def build_story_prompt(site):
+    return f"""
+    As a knowledgeable local guide, tell a short and engaging audio story (around 15 seconds when spoken) about the cultural significance, history, and key features of {site} in a way that would captivate a visitor. Only write raw story text without any additional commentary or instructions.
+    The story should be informative yet concise, suitable for a quick audio narration.
+    """
+
+
+def synthesize_speech(text):
+    """Narrates text with the "raj" voice and returns the WAV bytes. Raises TimeoutError when Waves does not
+    answer within SYNTHESIS_TIMEOUT_SECONDS."""
+    # The Waves client sends its requests without a timeout, so it runs on its own daemon thread and a hung
+    # narration is abandoned instead of blocking the caller (and its upstream slot) forever.
+    result = {}
+
+    def synthesize():
+        try:
+            result["audio"] = WavesClient(api_key=SMALLEST_API_KEY).synthesize(text=text, voice_id="raj")
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=synthesize, name="rangyatra-waves", daemon=True)
+    thread.start()
+    thread.join(SYNTHESIS_TIMEOUT_SECONDS)
+    if thread.is_alive():
+        raise TimeoutError(f"Speech synthesis did not finish within {SYNTHESIS_TIMEOUT_SECONDS} seconds")
+    if "error" in result:
+        raise result["error"]
+    return result["audio"]
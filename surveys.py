@@ -0,0 +1,286 @@
+"""Social Survey data helpers that run outside Streamlit (and therefore also on the job queue).
+
+Exports stream `social_survey_responses` through a batched cursor with a projection and write each batch to
+disk before fetching the next, so memory stays bounded by the batch size however many responses a survey has.
+AI summaries are likewise built incrementally, from only the responses received since the last update."""
+import csv
+import json
+import os
+import tempfile
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import gemini
+import semantic_cache
+
+EXPORT_DIR = os.environ.get("SURVEY_EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "rangyatra_exports")
+EXPORT_RETENTION_SECONDS = 24 * 3600
+EXPORT_FORMATS = {"CSV": "csv", "JSONL": "jsonl", "Parquet": "parquet"}
+EXPORT_FIELDS = ["survey_id", "question", "response_text", "responder_username", "responded_at"]
+EXPORT_BATCH_SIZE = 5000
+
+
+def ensure_indexes(surveys_collection, responses_collection, summaries_collection):
+    """Creates the indexes behind the survey listing, search, response and summary queries (no-op when they exist)."""
+    surveys_collection.create_index([("creator_username", 1), ("created_at", -1)])
+    surveys_collection.create_index([("created_at", -1)])
+    surveys_collection.create_index("survey_id")
+    surveys_collection.create_index([("question", "text")], name="question_text")
+    responses_collection.create_index([("survey_id", 1), ("responded_at", -1)])
+    responses_collection.create_index([("survey_id", 1), ("responded_at", 1), ("_id", 1)])  # Summary high-water mark
+    responses_collection.create_index([("response_text", "text")], name="response_text_text")
+    summaries_collection.create_index("survey_id", unique=True)
+
+
+def list_surveys(surveys_collection, creator_username=None, page=1, per_page=5):
+    """Returns (surveys, total) for one page of surveys, newest first, optionally of one creator only."""
+    survey_filter = {"creator_username": creator_username} if creator_username else {}
+    total = surveys_collection.count_documents(survey_filter)
+    cursor = surveys_collection.find(survey_filter).sort("created_at", -1).skip((page - 1) * per_page).limit(per_page)
+    return list(cursor), total
+
+
+# --- Search ---
+# Both collections carry a MongoDB text index, so matching, relevance ranking (textScore) and pagination all
+# happen on the server; only the requested page of results is ever sent to the app.
+def _date_range_filter(field, start=None, end=None):
+    """Builds a filter for start <= field < end + 1 day (dates are inclusive, either bound may be None)."""
+    bounds = {}
+    if start:
+        bounds["$gte"] = datetime.combine(start, datetime.min.time())
+    if end:
+        bounds["$lt"] = datetime.combine(end, datetime.min.time()) + timedelta(days=1)
+    return {field: bounds} if bounds else {}
+
+
+def search_surveys(surveys_collection, query, creator_username=None, start=None, end=None, page=1, per_page=5):
+    """Full-text search over survey questions. Returns (surveys, total), best matches first; each survey
+    has a "score" field."""
+    survey_filter = {"$text": {"$search": query}, **_date_range_filter("created_at", start, end)}
+    if creator_username:
+        survey_filter["creator_username"] = creator_username
+    total = surveys_collection.count_documents(survey_filter)
+    cursor = (surveys_collection.find(survey_filter, projection={"_id": 0, "score": {"$meta": "textScore"}})
+              .sort([("score", {"$meta": "textScore"}), ("created_at", -1)])
+              .skip((page - 1) * per_page).limit(per_page))
+    return list(cursor), total
+
+
+def search_responses(responses_collection, surveys_collection, query, creator_username=None, start=None, end=None,
+                     page=1, per_page=5):
+    """Full-text search over survey responses. Returns (responses, total), best matches first; each response
+    has "score" and the "question" of its survey. With creator_username, only that creator's surveys count."""
+    response_filter = {"$text": {"$search": query}, **_date_range_filter("responded_at", start, end)}
+    if creator_username:
+        survey_ids = [survey["survey_id"] for survey in surveys_collection.find(
+            {"creator_username": creator_username}, projection={"_id": 0, "survey_id": 1})]
+        response_filter["survey_id"] = {"$in": survey_ids}
+    total = responses_collection.count_documents(response_filter)
+    cursor = (responses_collection.find(response_filter, projection={"_id": 0, "score": {"$meta": "textScore"}})
+              .sort([("score", {"$meta": "textScore"}), ("responded_at", -1)])
+              .skip((page - 1) * per_page).limit(per_page))
+    results = list(cursor)
+    questions = {survey["survey_id"]: survey.get("question", "") for survey in surveys_collection.find(
+        {"survey_id": {"$in": list({response.get("survey_id") for response in results})}},
+        projection={"_id": 0, "survey_id": 1, "question": 1})}
+    for response in results:
+        response["question"] = questions.get(response.get("survey_id"), "")
+    return results, total
+
+
+def creator_questions(surveys_collection, creator_username):
+    """Returns {survey_id: question} for every survey of a creator."""
+    cursor = surveys_collection.find({"creator_username": creator_username},
+                                     projection={"_id": 0, "survey_id": 1, "question": 1})
+    return {survey["survey_id"]: survey.get("question", "") for survey in cursor}
+
+
+def iter_response_batches(responses_collection, questions, batch_size=EXPORT_BATCH_SIZE):
+    """Yields the responses to the given surveys as lists of export rows, one batch at a time."""
+    cursor = responses_collection.find(
+        {"survey_id": {"$in": list(questions)}},
+        projection={"_id": 0, "survey_id": 1, "response_text": 1, "responder_username": 1, "responded_at": 1},
+        batch_size=batch_size,
+    ).sort([("survey_id", 1), ("responded_at", -1)])
+    batch = []
+    for response in cursor:
+        batch.append({
+            "survey_id": response.get("survey_id"),
+            "question": questions.get(response.get("survey_id"), ""),
+            "response_text": response.get("response_text", ""),
+            "responder_username": response.get("responder_username"),
+            "responded_at": response.get("responded_at"),
+        })
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _write_csv(batches, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for batch in batches:
+            writer.writerows({**row, "responded_at": row["responded_at"].isoformat() if row["responded_at"] else ""}
+                             for row in batch)
+            yield len(batch)
+
+
+def _write_jsonl(batches, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in batches:
+            for row in batch:
+                row = {**row, "responded_at": row["responded_at"].isoformat() if row["responded_at"] else None}
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            yield len(batch)
+
+
+def _write_parquet(batches, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([
+        ("survey_id", pa.string()),
+        ("question", pa.string()),
+        ("response_text", pa.string()),
+        ("responder_username", pa.string()),
+        ("responded_at", pa.timestamp("ms")),
+    ])
+    # Each batch becomes one row group, so the writer never holds more than one batch.
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield len(batch)
+
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def new_export_path(fmt):
+    """Returns a fresh file path in the export directory, clearing out exports older than a day."""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    cutoff = time.time() - EXPORT_RETENTION_SECONDS
+    for name in os.listdir(EXPORT_DIR):
+        old_path = os.path.join(EXPORT_DIR, name)
+        if os.path.isfile(old_path) and os.path.getmtime(old_path) < cutoff:
+            os.remove(old_path)
+    stamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(EXPORT_DIR, f"survey_responses_{stamp}_{uuid.uuid4().hex[:8]}.{fmt}")
+
+
+def export_responses(responses_collection, questions, fmt, path, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """Streams the responses to `questions` ({survey_id: question}) into a CSV, JSONL or Parquet file.
+
+    progress, if given, is called as progress(rows_written) after each batch. Returns the number of rows."""
+    rows = 0
+    for written in _WRITERS[fmt](iter_response_batches(responses_collection, questions, batch_size), path):
+        rows += written
+        if progress:
+            progress(rows)
+    return rows
+
+
+# --- AI summaries ---
+# Each survey keeps one stored summary document with a rolling summary, ranked place mentions and a
+# high-water mark (responded_at, _id) of the last response it covers. Updating sends only responses past the
+# mark to Gemini, in batches bounded by an estimated token budget, and advances the mark after every batch.
+# Viewing a summary is a single find_one.
+SUMMARY_BATCH_TOKENS = int(os.environ.get("SUMMARY_BATCH_TOKENS") or 6000)
+SUMMARY_MAX_RESPONSE_CHARS = 2000
+SUMMARY_TOP_PLACES = 20
+SUMMARY_SAFETY_LAG_SECONDS = 60  # Responses are summarized once they are this old (see _new_responses)
+
+
+def build_summary_prompt(question, summary, responses_summarized, new_responses):
+    answers = "\n".join(f"- {text}" for text in new_responses)
+    return f"""
+    You maintain a running summary of the answers to the survey question "{question}".
+    Current summary (covering {responses_summarized} earlier responses): {summary or "None yet."}
+
+    New responses:
+    {answers}
+
+    Please provide the information in a structured JSON format.
+    The JSON should have the following keys:
+    - "summary": A string of 3-5 sentences summarizing all responses so far, merging the new responses into the current summary.
+    - "places": An array of objects for places, spots, dishes or events named in the NEW responses only. Each object should have:
+        - "name": String, the name as a traveller would search for it.
+        - "mentions": Integer, how many of the new responses mention it.
+
+    Ensure the JSON is valid and complete. Do not include any text outside the JSON block.
+    """
+
+
+def get_summary(summaries_collection, survey_id):
+    return summaries_collection.find_one({"survey_id": survey_id}, projection={"_id": 0})
+
+
+def _merge_places(top_places, new_places):
+    """Adds new mention counts to the stored ranking, merging names that normalize to the same key."""
+    merged = {semantic_cache.normalize(place["name"]): dict(place) for place in top_places}
+    for place in new_places:
+        if not isinstance(place, dict) or not str(place.get("name") or "").strip():
+            continue
+        key = semantic_cache.normalize(place["name"])
+        mentions = int(place.get("mentions") or 1)
+        if key in merged:
+            merged[key]["mentions"] += mentions
+        else:
+            merged[key] = {"name": str(place["name"]).strip(), "mentions": mentions}
+    return sorted(merged.values(), key=lambda place: -place["mentions"])[:SUMMARY_TOP_PLACES]
+
+
+def _new_responses(responses_collection, survey_id, high_water_mark):
+    # responded_at is set by the client before the insert, so a response can commit after a later-stamped one
+    # was summarized. Responses younger than the lag are left for the next update, so none fall behind the mark.
+    response_filter = {"survey_id": survey_id,
+                       "responded_at": {"$lt": datetime.utcnow() - timedelta(seconds=SUMMARY_SAFETY_LAG_SECONDS)}}
+    if high_water_mark:
+        responded_at, last_id = high_water_mark["responded_at"], high_water_mark["_id"]
+        response_filter["$or"] = [{"responded_at": {"$gt": responded_at}},
+                                  {"responded_at": responded_at, "_id": {"$gt": last_id}}]
+    return responses_collection.find(response_filter, projection={"response_text": 1, "responded_at": 1},
+                                     batch_size=500).sort([("responded_at", 1), ("_id", 1)])
+
+
+def update_summary(summaries_collection, responses_collection, survey_id, question, progress=None, upstream=None):
+    """Folds the responses received since the last update into a survey's stored summary.
+
+    progress, if given, is called as progress(responses_summarized) after each batch. upstream, if given, is a
+    factory of context managers held around each batch's Gemini call (e.g. a job's upstream slot), so a long
+    update never holds one for longer than a single call. Returns the updated summary document, or the stored
+    one unchanged when there is nothing new."""
+    doc = get_summary(summaries_collection, survey_id) or {
+        "survey_id": survey_id, "summary": "", "top_places": [], "responses_summarized": 0, "high_water_mark": None}
+
+    def flush(batch, last_response):
+        prompt = build_summary_prompt(question, doc["summary"], doc["responses_summarized"], batch)
+        with upstream() if upstream else nullcontext():
+            result = gemini.generate_json(prompt)
+        doc["summary"] = str(result.get("summary") or doc["summary"])
+        doc["top_places"] = _merge_places(doc["top_places"], result.get("places") or [])
+        doc["responses_summarized"] += len(batch)
+        doc["high_water_mark"] = {"responded_at": last_response.get("responded_at"), "_id": last_response["_id"]}
+        doc["updated_at"] = datetime.utcnow()
+        summaries_collection.update_one({"survey_id": survey_id}, {"$set": doc}, upsert=True)
+        if progress:
+            progress(doc["responses_summarized"])
+
+    budget = SUMMARY_BATCH_TOKENS - gemini.estimate_tokens(build_summary_prompt(question, doc["summary"], 0, []))
+    batch, batch_tokens, last_response = [], 0, None
+    for response in _new_responses(responses_collection, survey_id, doc["high_water_mark"]):
+        text = str(response.get("response_text") or "")[:SUMMARY_MAX_RESPONSE_CHARS]
+        tokens = gemini.estimate_tokens(text)
+        if batch and batch_tokens + tokens > budget:
+            flush(batch, last_response)
+            budget = SUMMARY_BATCH_TOKENS - gemini.estimate_tokens(build_summary_prompt(question, doc["summary"], 0, []))
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+        last_response = response
+    if batch:
+        flush(batch, last_response)
+    return doc
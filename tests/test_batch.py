@@ -0,0 +1,108 @@
+import json
+import threading
+
+import pytest
+
+import batch
+import gemini
+import planner
+
+
+@pytest.fixture
+def plans(monkeypatch):
+    calls = []
+
+    def generate_travel_plan(current_location, destination, num_days, interest):
+        calls.append(destination)
+        if destination == "Nowhere":
+            raise ValueError("Failed to generate valid travel plan")
+        return {"itinerary": [{"day": day} for day in range(1, num_days + 1)],
+                "recommended_places": [f"{destination} Fort"]}
+
+    monkeypatch.setattr(gemini, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(planner, "generate_travel_plan", generate_travel_plan)
+    monkeypatch.setattr(planner, "search_hotels", lambda place: [{"name": f"Hotel near {place}"}])
+    return calls
+
+
+def row(destination, num_days=2, interest="Food"):
+    return {"current_location": "Delhi", "destination": destination, "num_days": num_days, "interest": interest}
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_duplicate_and_invalid_rows(plans, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    rows = [row("Goa"), row("goa", interest="food"), row("Hampi", num_days=0), row("Jaipur", interest="Golf"),
+            {"destination": "Kochi"}]
+    summary = batch.run_batch(rows, output, concurrency=2)
+    assert plans == ["Goa"]
+    assert summary == {"ok": 1, "failed": 3, "skipped": 0, "hotel_searches": 1}
+    records = read_jsonl(output)
+    assert [record["status"] for record in records] == ["ok", "error", "error", "error"]
+    assert records[0]["hotels"] == {"Goa Fort": [{"name": "Hotel near Goa Fort"}]}
+    assert "num_days" in records[1]["error"] and "interest" in records[2]["error"]
+
+
+def test_checkpoint_resume(plans, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    rows = [row("Goa"), row("Nowhere"), row("Hampi")]
+    first = batch.run_batch(rows, output, enrich_hotels=False)
+    assert (first["ok"], first["failed"]) == (2, 1)
+
+    plans.clear()
+    second = batch.run_batch(rows, output, enrich_hotels=False)
+    assert plans == ["Nowhere"]  # Only the failed request is generated again
+    assert second["skipped"] == 2
+    assert [record["destination"] for record in read_jsonl(output)] == ["Goa", "Nowhere", "Hampi"]
+
+
+def test_hotel_lookup_errors_reach_every_waiter(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def search_hotels(place):
+        started.set()
+        release.wait(5)
+        raise ConnectionError("RapidAPI unreachable")
+
+    monkeypatch.setattr(planner, "search_hotels", search_hotels)
+    lookups = batch.HotelLookups()
+    errors = []
+
+    def search():
+        try:
+            lookups.search("Goa Fort")
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 3
+
+
+def test_rpm_gives_the_run_its_own_scheduler(plans, monkeypatch, tmp_path):
+    schedulers = []
+    monkeypatch.setattr(planner, "generate_travel_plan",
+                        lambda *args: schedulers.append(gemini.current_scheduler()) or {"recommended_places": []})
+    process_scheduler, process_rpm = gemini.scheduler, gemini.scheduler.requests_per_minute
+
+    batch.run_batch([row("Goa"), row("Hampi")], str(tmp_path / "out.jsonl"), requests_per_minute=7,
+                    enrich_hotels=False)
+    assert len(schedulers) == 2 and schedulers[0] is schedulers[1]
+    assert schedulers[0] is not process_scheduler and schedulers[0].requests_per_minute == 7
+    assert schedulers[0].budget_share[gemini.BULK] == 1.0
+    assert schedulers[0].store is process_scheduler.store  # Still counted in the window shared with the app
+    assert gemini.scheduler is process_scheduler and gemini.scheduler.requests_per_minute == process_rpm
+
+    schedulers.clear()
+    batch.run_batch([row("Kochi")], str(tmp_path / "default.jsonl"), enrich_hotels=False)
+    assert schedulers == [process_scheduler]
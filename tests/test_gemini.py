@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+import gemini
+
+
+@pytest.fixture(autouse=True)
+def short_window(monkeypatch):
+    monkeypatch.setattr(gemini, "WINDOW_SECONDS", 0.5)
+    monkeypatch.setattr(gemini, "STORE_POLL_SECONDS", 0.05)
+
+
+@pytest.fixture(params=["local", "store"])
+def make_scheduler(request, tmp_path):
+    store = gemini.QuotaStore(str(tmp_path / "quota.sqlite3")) if request.param == "store" else None
+    return lambda rpm, tpm=10 ** 9, **kwargs: gemini.QuotaScheduler(rpm, tpm, store=store, **kwargs)
+
+
+def start(scheduler, tokens, priority, admitted, name):
+    thread = threading.Thread(target=lambda: admitted.append((name, scheduler.acquire(tokens, priority))))
+    thread.start()
+    return thread
+
+
+def test_requests_per_minute(make_scheduler):
+    scheduler = make_scheduler(2)
+    scheduler.acquire(10, gemini.INTERACTIVE)
+    scheduler.acquire(10, gemini.INTERACTIVE)
+    admitted = []
+    thread = start(scheduler, 10, gemini.INTERACTIVE, admitted, "third")
+    time.sleep(0.2)
+    assert admitted == []  # The window is full
+    thread.join(2)
+    assert [name for name, _ in admitted] == ["third"]
+
+
+def test_budget_shares(make_scheduler):
+    scheduler = make_scheduler(10)
+    for _ in range(6):  # BULK may use 60% of the requests
+        scheduler.acquire(10, gemini.BULK)
+    admitted = []
+    bulk = start(scheduler, 10, gemini.BULK, admitted, "bulk")
+    time.sleep(0.1)
+    assert admitted == []
+    scheduler.acquire(10, gemini.INTERACTIVE)  # Interactive calls keep their headroom
+    bulk.join(2)
+    assert [name for name, _ in admitted] == ["bulk"]
+
+
+def test_waiting_calls_are_admitted_by_priority(make_scheduler):
+    scheduler = make_scheduler(1)
+    scheduler.acquire(10, gemini.INTERACTIVE)
+    admitted = []
+    threads = [start(scheduler, 10, gemini.BULK, admitted, "bulk")]
+    time.sleep(0.05)
+    threads.append(start(scheduler, 10, gemini.NORMAL, admitted, "normal"))
+    time.sleep(0.05)
+    threads.append(start(scheduler, 10, gemini.INTERACTIVE, admitted, "interactive"))
+    for thread in threads:
+        thread.join(3)
+    assert [name for name, _ in admitted] == ["interactive", "normal", "bulk"]
+
+
+def test_tokens_per_minute_and_settle(make_scheduler):
+    scheduler = make_scheduler(100, tpm=1000)
+    first = scheduler.acquire(900, gemini.INTERACTIVE)  # Estimated prompt plus maximum response
+    admitted = []
+    thread = start(scheduler, 500, gemini.INTERACTIVE, admitted, "second")
+    time.sleep(0.1)
+    assert admitted == []
+    scheduler.settle(first, "Travel Planner", "asha", 150, 50)  # The call turned out to be much smaller
+    time.sleep(0.1)
+    assert [name for name, _ in admitted] == ["second"]
+    thread.join(1)
+
+    scheduler.settle(admitted[0][1], "Travel Planner", "asha", 300, 100)
+    assert scheduler.usage() == [{"page": "Travel Planner", "user": "asha", "requests": 2,
+                                  "prompt_tokens": 450, "response_tokens": 150}]
+
+
+def test_store_is_shared_between_processes(tmp_path):
+    store_path = str(tmp_path / "quota.sqlite3")
+    app = gemini.QuotaScheduler(2, 10 ** 9, store=gemini.QuotaStore(store_path))
+    batch = gemini.QuotaScheduler(2, 10 ** 9, store=gemini.QuotaStore(store_path))
+    app.settle(app.acquire(10, gemini.INTERACTIVE), "Travel Planner", "asha", 5, 5)
+    batch.settle(batch.acquire(10, gemini.INTERACTIVE), "Batch", None, 7, 3)
+    admitted = []
+    thread = start(app, 10, gemini.INTERACTIVE, admitted, "third")
+    time.sleep(0.2)
+    assert admitted == []  # Both processes' calls count against one budget
+    thread.join(2)
+    assert admitted
+    assert sorted((row["page"], row["requests"]) for row in app.usage()) == [("Batch", 1), ("Travel Planner", 1)]
+
+
+def test_generate_text_settles_actual_usage(monkeypatch):
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"candidates": [{"content": {"parts": [{"text": "Namaste"}]}}],
+                    "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": 3}}
+
+    requests_made = []
+    monkeypatch.setattr(gemini, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(gemini.requests, "post", lambda *args, **kwargs: requests_made.append(kwargs) or Response())
+    scheduler = gemini.QuotaScheduler(10, 10 ** 6)
+    with gemini.use_scheduler(scheduler), gemini.caller("Whispering Walls", "asha", gemini.INTERACTIVE):
+        assert gemini.generate_text("Tell a story") == "Namaste"
+    assert requests_made[0]["timeout"] == gemini.REQUEST_TIMEOUT_SECONDS
+    assert scheduler.usage() == [{"page": "Whispering Walls", "user": "asha", "requests": 1,
+                                  "prompt_tokens": 12, "response_tokens": 3}]
@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] not in jobs.ACTIVE_STATUSES:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_active_jobs_are_shared(db_path):
+    queue = jobs.JobQueue(db_path)
+    release = threading.Event()
+    calls = []
+
+    def work(job, value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    first = queue.submit("plan", ("Goa", 3), work, 21, owner="s1")
+    second = queue.submit("plan", ("Goa", 3), work, 21, owner="s2")
+    assert first == second
+    assert [job["job_id"] for job in queue.list_jobs("s2")] == [first]
+    release.set()
+    assert wait_for(queue, first)["result"] == 42
+    assert calls == [21]
+
+    third = queue.submit("plan", ("Goa", 3), work, 21, owner="s1")
+    assert third != first  # Finished jobs are only reused with reuse_done
+    wait_for(queue, third)
+
+
+def test_reuse_done(db_path):
+    queue = jobs.JobQueue(db_path)
+    first = queue.submit("story", "hampi", lambda job: "story")
+    wait_for(queue, first)
+    assert queue.submit("story", "hampi", lambda job: "other", reuse_done=True) == first
+    assert queue.submit("story", "konark", lambda job: "other", reuse_done=True) != first
+
+
+def test_failures_and_unpicklable_results(db_path):
+    queue = jobs.JobQueue(db_path)
+
+    def fail(job):
+        raise ValueError("no answer")
+
+    failed = wait_for(queue, queue.submit("plan", "a", fail))
+    assert (failed["status"], failed["error"]) == (jobs.FAILED, "no answer")
+
+    unpicklable = wait_for(queue, queue.submit("plan", "b", lambda job: threading.Lock()))
+    assert unpicklable["status"] == jobs.FAILED
+    assert unpicklable["result"] is None
+
+
+def test_only_stale_jobs_of_other_instances_are_failed(db_path):
+    queue = jobs.JobQueue(db_path)
+    release = threading.Event()
+    running = queue.submit("plan", "live", lambda job: release.wait(5) and "done")
+    now = time.time()
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO jobs (job_id, kind, job_key, status, created_at, updated_at, instance_id, "
+                         "heartbeat_at) VALUES (?, 'plan', ?, 'running', ?, ?, ?, ?)",
+                         [("stale", "'stale'", now, now, "stopped-process", now - jobs.STALE_AFTER_SECONDS - 10),
+                          ("fresh", "'fresh'", now, now, "other-process", now)])
+
+    jobs.JobQueue(db_path)  # Another process starting up
+    assert queue.get("stale")["status"] == jobs.FAILED
+    assert queue.get("fresh")["status"] == jobs.RUNNING
+    assert queue.get(running)["status"] in jobs.ACTIVE_STATUSES
+    release.set()
+    assert wait_for(queue, running)["result"] == "done"
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+import shared_cache
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path, monkeypatch):
+    if request.param == "memory":
+        return shared_cache.MemoryBackend()
+    if request.param == "sqlite":
+        return shared_cache.SQLiteBackend(str(tmp_path / "shared_cache.sqlite3"))
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = pytest.importorskip("redis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url", lambda url, **kwargs: fakeredis.FakeRedis(server=server))
+    return shared_cache.RedisBackend("redis://localhost:6379/0")
+
+
+def test_round_trip(backend):
+    cache = shared_cache.SharedCache(backend)
+    value = {"footfall_data": [{"month": "Jan", "visitors": 1200}], "note": "Kathakali · ಕನ್ನಡ"}
+    assert cache.get("footfall", "Kerala") is None
+    assert cache.set("footfall", "Kerala", value=value) == value
+    assert cache.get("footfall", "Kerala") == value
+    assert cache.get("footfall", "Goa") is None
+    cache.delete("footfall", "Kerala")
+    assert cache.get("footfall", "Kerala") is None
+
+
+def test_ttl_expiry(backend):
+    cache = shared_cache.SharedCache(backend, ttl=1)
+    cache.set("footfall", "Kerala", value={"footfall_data": [1]})
+    cache.set("footfall", "Goa", value={"footfall_data": [2]}, ttl=60)
+    assert cache.get("footfall", "Kerala") == {"footfall_data": [1]}
+    time.sleep(1.2)
+    assert cache.get("footfall", "Kerala") is None
+    assert cache.get("footfall", "Goa") == {"footfall_data": [2]}
+
+
+def test_namespaces_and_versions_are_isolated(backend, monkeypatch):
+    cache = shared_cache.SharedCache(backend, namespace="one")
+    other = shared_cache.SharedCache(backend, namespace="two")
+    cache.set("footfall", "Kerala", value=1)
+    other.set("footfall", "Kerala", value=2)
+    assert cache.get("footfall", "Kerala") == 1
+    assert other.get("footfall", "Kerala") == 2
+    assert cache.key("footfall", "Kerala") == f"one:v{shared_cache.CACHE_VERSION}:footfall:[\"Kerala\"]"
+
+    monkeypatch.setattr(shared_cache, "CACHE_VERSION", shared_cache.CACHE_VERSION + 1)
+    assert cache.get("footfall", "Kerala") is None
+    cache.set("footfall", "Kerala", value=3)
+    assert cache.get("footfall", "Kerala") == 3
+
+
+def test_long_inputs_are_hashed(backend):
+    cache = shared_cache.SharedCache(backend)
+    long_input, other_input = "Hampi " * 100, "Hampi " * 99 + "Hampy "
+    key = cache.key("highlight_image", long_input)
+    assert len(key) < shared_cache.MAX_KEY_LENGTH
+    assert key != cache.key("highlight_image", other_input)
+    cache.set("highlight_image", long_input, value="a.jpg")
+    cache.set("highlight_image", other_input, value="b.jpg")
+    assert cache.get("highlight_image", long_input) == "a.jpg"
+    assert cache.get("highlight_image", other_input) == "b.jpg"
+
+
+def test_backend_errors_are_misses():
+    class BrokenBackend:
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def set(self, key, value, ttl=None):
+            raise ConnectionError("down")
+
+        def delete(self, key):
+            raise ConnectionError("down")
+
+    cache = shared_cache.SharedCache(BrokenBackend())
+    assert cache.set("footfall", "Kerala", value=1) == 1
+    assert cache.get("footfall", "Kerala") is None
+    cache.delete("footfall", "Kerala")